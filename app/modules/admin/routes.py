@@ -1,9 +1,12 @@
+import os
+
 from . import admin_bp
 from .forms import UserAdminForm 
-from flask import render_template, redirect, url_for, flash, request, abort
+from flask import render_template, redirect, url_for, flash, request, abort, jsonify
 from flask_login import login_required, current_user 
 from functools import wraps 
 from app.modules.auth.models import db, User, Role 
+from core.database.pool import pool_statistics
 
 def is_admin():
     """Verifica si el usuario actual está activo y tiene el rol 'admin'."""
@@ -70,8 +73,20 @@ def edit_user(user_id):
         
         form.roles.data = [current_role_id_str] if current_role_id_str else []
 
-    return render_template('user_management.html', 
-                             title='Editar Usuario', 
-                             form=form, 
-                             user_to_edit=user,
-                             users=users)
\ No newline at end of file
+    return render_template(
+        'user_management.html',
+        title='Editar Usuario',
+        form=form,
+        user_to_edit=user,
+        users=users,
+    )
+
+
+@admin_bp.route('/db/pool')
+@login_required
+def db_pool_statistics():
+    """Estado del pool de conexiones de este worker (cada proceso de gunicorn tiene el suyo)."""
+    if not is_admin():
+        abort(403)
+    engines = {bind or 'default': pool_statistics(engine) for bind, engine in db.engines.items()}
+    return jsonify({'pid': os.getpid(), 'engines': engines})
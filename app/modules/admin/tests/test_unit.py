@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app import db
+from app.modules.auth.models import Role, User
+from app.modules.conftest import login, logout
+from core.database.pool import InstrumentedQueuePool, pool_statistics
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.2
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_pool_counts_waits_timeouts_and_connects(engine):
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert pool_statistics(engine)["checked_out"] == 1
+
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+        releaser = threading.Timer(0.05, connection.close)
+        releaser.start()
+        with engine.connect():
+            pass
+        releaser.join()
+
+    statistics = pool_statistics(engine)
+    assert statistics["checked_out"] == 0
+    assert (statistics["checkouts"], statistics["timeouts"], statistics["waits"]) == (2, 1, 2)
+    assert statistics["wait_seconds_max"] >= 0.2
+    assert statistics["connects"] == 1
+
+    # Counters survive the pool being replaced, as gunicorn workers do after fork
+    engine.dispose(close=False)
+    with engine.connect():
+        pass
+    statistics = pool_statistics(engine)
+    assert (statistics["checkouts"], statistics["connects"]) == (3, 2)
+
+
+def test_pool_statistics_endpoint_is_for_admins(test_client):
+    response = test_client.get("/admin/db/pool")
+    assert response.status_code in (302, 401)
+
+    admin_role = Role.query.filter_by(name="admin").first() or Role(name="admin", description="Administrador")
+    admin = User(email="pool-admin@example.com", password="admin1234", role=admin_role)
+    db.session.add(admin)
+    db.session.commit()
+
+    login(test_client, "test@example.com", "test1234")
+    assert test_client.get("/admin/db/pool").status_code == 403
+    logout(test_client)
+
+    login(test_client, "pool-admin@example.com", "admin1234")
+    response = test_client.get("/admin/db/pool")
+    logout(test_client)
+
+    assert response.status_code == 200
+    default = response.json["engines"]["default"]
+    assert {"checked_out", "overflow", "checkouts", "wait_seconds_avg"} <= default.keys()
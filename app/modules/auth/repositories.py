@@ -1,3 +1,5 @@
+from sqlalchemy.orm import joinedload
+
 from app.modules.auth.models import User
 from core.repositories.BaseRepository import BaseRepository
 
@@ -19,3 +21,13 @@ class UserRepository(BaseRepository):
 
     def get_by_email(self, email: str):
         return self.model.query.filter_by(email=email).first()
+
+    def get_with_role_and_profile(self, user_id: int, session=None):
+        """The user with its role and profile, in one query."""
+        session = session or self.session
+        return (
+            session.query(self.model)
+            .options(joinedload(self.model.role), joinedload(self.model.profile))
+            .filter_by(id=user_id)
+            .first()
+        )
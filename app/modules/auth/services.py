@@ -1,5 +1,6 @@
 import os
 import secrets 
+import threading
 
 from flask_login import current_user, login_user
 
@@ -10,9 +11,14 @@ from app.modules.profile.models import UserProfile
 from app.modules.profile.repositories import UserProfileRepository
 from core.configuration.configuration import uploads_folder_name
 from core.services.BaseService import BaseService
-from flask import url_for, current_app, render_template
+from flask import url_for, current_app, has_app_context, render_template
 # Solo necesitamos la clase Message de flask_mail para construir el email
 from flask_mail import Message 
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.util import identity_key
+
+from core.cache.backends import MemoryCache
 
 class AuthenticationService(BaseService):
     
@@ -180,4 +186,94 @@ def send_password_reset_email(user):
             f"FALLO CRÍTICO al enviar el correo a {user.email}. Error: {e.__class__.__name__}",
             exc_info=True 
         )
-        return False
\ No newline at end of file
+        return False
+
+
+class UserIdentityCache:
+    """
+    Per-process cache of the authenticated users, loaded with their role and profile in one joined query. Entries
+    are detached copies that are merged into each request's session without a query, so `current_user.role` and
+    `current_user.profile` cost nothing. They expire after USER_CACHE_TTL seconds and are dropped as soon as a commit
+    changes the user, its profile or any role (in this process; other workers catch up within the TTL).
+    """
+
+    _instances_lock = threading.Lock()
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.entries = MemoryCache(max_entries=max_entries, default_ttl=ttl)
+        self.repository = UserRepository()
+
+    @classmethod
+    def for_app(cls, app) -> "UserIdentityCache":
+        with cls._instances_lock:
+            cache = app.extensions.get("user_identity_cache")
+            if cache is None:
+                cache = cls(
+                    ttl=app.config.get("USER_CACHE_TTL", 60),
+                    max_entries=app.config.get("CACHE_MAX_ENTRIES", 1024),
+                )
+                app.extensions["user_identity_cache"] = cache
+            return cache
+
+    def load(self, user_id: int) -> User | None:
+        attached = db.session.identity_map.get(identity_key(User, user_id))
+        if attached is not None:
+            return attached
+
+        user = self.entries.get(str(user_id))
+        if user is None:
+            # Loaded in a session of its own, so the cached copy is detached and no request ever modifies it
+            with Session(db.engine) as session:
+                user = self.repository.get_with_role_and_profile(user_id, session=session)
+            if user is None:
+                return None
+            self.entries.set(str(user_id), user, tags=[f"user:{user_id}", "users"])
+        return db.session.merge(user, load=False)
+
+    def invalidate_user(self, user_id: int):
+        self.entries.invalidate_tags(f"user:{user_id}")
+
+    def clear(self):
+        self.entries.invalidate_tags("users")
+
+
+def get_user_identity_cache() -> UserIdentityCache:
+    return UserIdentityCache.for_app(current_app._get_current_object())
+
+
+def _mark_user_changed(mapper, connection, target):
+    user_id = target.id if isinstance(target, User) else target.user_id
+    object_session(target).info.setdefault("changed_user_ids", set()).add(user_id)
+
+
+def _mark_roles_changed(mapper, connection, target):
+    object_session(target).info["roles_changed"] = True
+
+
+def _invalidate_identities_after_commit(session):
+    user_ids = session.info.pop("changed_user_ids", set())
+    roles_changed = session.info.pop("roles_changed", False)
+    if not (user_ids or roles_changed) or not has_app_context():
+        return
+    if "user_identity_cache" not in current_app.extensions:
+        return
+    cache = get_user_identity_cache()
+    if roles_changed:
+        cache.clear()
+    for user_id in user_ids:
+        cache.invalidate_user(user_id)
+
+
+def _forget_identities_after_rollback(session, previous_transaction):
+    session.info.pop("changed_user_ids", None)
+    session.info.pop("roles_changed", None)
+
+
+for _model in (User, UserProfile):
+    event.listen(_model, "after_update", _mark_user_changed)
+    event.listen(_model, "after_delete", _mark_user_changed)
+event.listen(UserProfile, "after_insert", _mark_user_changed)
+event.listen(Role, "after_update", _mark_roles_changed)
+event.listen(Role, "after_delete", _mark_roles_changed)
+event.listen(db.session, "after_commit", _invalidate_identities_after_commit)
+event.listen(db.session, "after_soft_rollback", _forget_identities_after_rollback)
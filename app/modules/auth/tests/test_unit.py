@@ -416,4 +416,48 @@ def test_verify_reset_token_no_expiration(mock_db_session, mock_query, mock_date
     assert mock_user.reset_token is None
     assert mock_user.token_expiration is None
     # Verifica que se hizo commit de la limpieza
-    mock_db_session.commit.assert_called_once()
\ No newline at end of file
+    mock_db_session.commit.assert_called_once()
+
+def test_identity_cache_loads_user_role_and_profile_in_one_query(test_client):
+    from sqlalchemy import event
+
+    from app.modules.auth.services import get_user_identity_cache
+    from app.modules.profile.models import UserProfile
+
+    if db.session.get(Role, 1) is None:
+        db.session.add(Role(id=1, name="user", description="Default user role"))
+    user = User(email="cached@example.com", password="test1234")
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(UserProfile(user_id=user.id, name="Test", surname="Cached"))
+    db.session.commit()
+    user_id = user.id
+    cache = get_user_identity_cache()
+    cache.clear()
+    db.session.remove()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        loaded = cache.load(user_id)
+        assert (loaded.role.name, loaded.profile.user_id) == ("user", user_id)
+        assert len(statements) == 1
+        db.session.remove()
+
+        loaded = cache.load(user_id)
+        assert (loaded.role.name, loaded.profile.user_id) == ("user", user_id)
+        assert len(statements) == 1
+
+        loaded.profile.surname = "Renamed"
+        db.session.commit()
+        db.session.remove()
+        statements.clear()
+        assert cache.load(user_id).profile.surname == "Renamed"
+        assert len(statements) == 1
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+        db.session.remove()
@@ -3,7 +3,7 @@ from wtforms import FieldList, FormField, SelectField, StringField, ValidationEr
 from wtforms.validators import URL, DataRequired, Optional, Length
 from flask_wtf.file import FileField, FileAllowed, FileRequired
 from app.modules.dataset.models import PublicationType, DataSet, Community
-import pandas as pd
+from app.modules.dataset.services import CSV_SNIFF_BYTES, sniff_csv_sample
 
 class CommunityDatasetForm(FlaskForm):
     datasets = SelectMultipleField(
@@ -86,6 +86,9 @@ class DataSetForm(FlaskForm):
     def validate_csv_file(self, field):
         if not field.data:
             return
+
+        # pandas tarda cientos de ms en importarse: solo se carga al validar una subida
+        import pandas as pd
         
         STRONG_BEER_INDICATORS = {
             'ibu', 'srm', 'ebc', 'style', 'brewery', 'og', 'fg', 'attenuation', 'abv', 'ph'}
@@ -156,14 +159,26 @@ class DataSetForm(FlaskForm):
         CONFIDENCE_THRESHOLD = 0.5    # 60% de los nombres deben coincidir con la lista de referencia
         MIN_CONFIDENCE_FOR_OVERRIDE = 0.7
 
-        def try_read(encoding):
+        def try_read(encoding, sep=None):
             field.data.seek(0)
             try:
-                return pd.read_csv(field.data, nrows=MIN_ROWS_TO_SAMPLE, encoding=encoding, sep=None, engine='python')
+                if sep is None:
+                    return pd.read_csv(
+                        field.data, nrows=MIN_ROWS_TO_SAMPLE, encoding=encoding, sep=None, engine='python'
+                    )
+                # Con el separador ya detectado se usa el parser en C
+                return pd.read_csv(field.data, nrows=MIN_ROWS_TO_SAMPLE, encoding=encoding, sep=sep)
             except Exception:
                 return None
 
-        df = try_read('utf-8')
+        # Detectar codificación y separador sobre un prefijo del fichero en lugar de parsearlo entero
+        field.data.seek(0)
+        sample = field.data.read(CSV_SNIFF_BYTES)
+        encoding, delimiter = sniff_csv_sample(sample, truncated=len(sample) == CSV_SNIFF_BYTES)
+
+        df = try_read(encoding, delimiter)
+        if df is None:
+            df = try_read('utf-8')
         if df is None:
             df = try_read('latin-1')
 
@@ -54,6 +54,8 @@ class DSMetaData(db.Model):
 
 
 class DataSet(db.Model):
+    __table_args__ = (db.Index("ix_data_set_created_at_id", "created_at", "id"),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
@@ -64,6 +66,9 @@ class DataSet(db.Model):
     ds_meta_data = db.relationship("DSMetaData", backref=db.backref("data_set", uselist=False))
     
     csv_file_path = db.Column(db.String(500), nullable=True)
+    size_bytes = db.Column(db.BigInteger, nullable=True)
+    checksum = db.Column(db.String(32), nullable=True)
+    checksum_sha256 = db.Column(db.String(64), nullable=True)
     row_count = db.Column(db.Integer)
     column_names = db.Column(db.Text)
 
@@ -90,16 +95,17 @@ class DataSet(db.Model):
     def get_zenodo_url(self):
         return f"https://zenodo.org/record/{self.ds_meta_data.deposition_id}" if self.ds_meta_data.dataset_doi else None
 
+    def get_zenodo_status(self):
+        # None when the dataset was never queued for Zenodo; otherwise the status of its `zenodo:worker` job
+        job = self.zenodo_job
+        return job.status.value if job else None
+
     def get_files_count(self):
         return 1 if self.csv_file_path else 0
 
     def get_file_total_size(self):
-        try:
-            if self.csv_file_path and os.path.exists(self.csv_file_path):
-                return os.path.getsize(self.csv_file_path)
-        except Exception:
-            pass
-        return 0
+        # Filled at upload time (or by `rosemary dataset:backfill`), so rendering never touches the upload volume
+        return self.size_bytes or 0
 
     def get_file_total_size_for_human(self):
         from app.modules.dataset.services import SizeService
@@ -109,30 +115,35 @@ class DataSet(db.Model):
     def get_uvlhub_doi(self):
         from app.modules.dataset.services import DataSetService
 
-        return DataSetService().get_uvlhub_doi(self)
+        return DataSetService.get_uvlhub_doi(self)
 
     def to_dict(self):
+        from app.modules.dataset.services import SizeService
+
+        ds_meta_data = self.ds_meta_data
+        total_size = self.get_file_total_size()
+
         return {
-            "title": self.ds_meta_data.title,
+            "title": ds_meta_data.title,
             "id": self.id,
             "created_at": self.created_at,
             "created_at_timestamp": int(self.created_at.timestamp()),
-            "description": self.ds_meta_data.description,
-            "authors": [author.to_dict() for author in self.ds_meta_data.authors],
+            "description": ds_meta_data.description,
+            "authors": [author.to_dict() for author in ds_meta_data.authors],
             "publication_type": self.get_cleaned_publication_type(),
-            "publication_doi": self.ds_meta_data.publication_doi,
-            "dataset_doi": self.ds_meta_data.dataset_doi,
-            "tags": self.ds_meta_data.tags.split(",") if self.ds_meta_data.tags else [],
+            "publication_doi": ds_meta_data.publication_doi,
+            "dataset_doi": ds_meta_data.dataset_doi,
+            "tags": ds_meta_data.tags.split(",") if ds_meta_data.tags else [],
             "url": self.get_uvlhub_doi(),
             "download": f'{request.host_url.rstrip("/")}/dataset/download/{self.id}',
             "zenodo": self.get_zenodo_url(),
             "files": [{
-                "name": os.path.basename(self.csv_file_path) if self.csv_file_path else "N/A",
-                "size_in_bytes": self.get_file_total_size()
+                "name": os.path.basename(self.csv_file_path),
+                "size_in_bytes": total_size
             }] if self.csv_file_path else [],
             "files_count": self.get_files_count(), 
-            "total_size_in_bytes": self.get_file_total_size(), 
-            "total_size_in_human_format": self.get_file_total_size_for_human(), 
+            "total_size_in_bytes": total_size, 
+            "total_size_in_human_format": SizeService().get_human_readable_size(total_size), 
             "download_count": self.download_count,
           
             "csv_metrics": {
@@ -168,6 +179,12 @@ class Community(db.Model):
         return f"Community<{self.id} - {self.name}>"
 
 class DSDownloadRecord(db.Model):
+    # Counting by dataset and date range and the (user, dataset, cookie) dedupe lookup are answered from the indexes
+    __table_args__ = (
+        db.Index("ix_ds_download_record_dataset_id_download_date", "dataset_id", "download_date"),
+        db.Index("ix_ds_download_record_dataset_id_cookie_user_id", "dataset_id", "download_cookie", "user_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id"))
@@ -184,6 +201,12 @@ class DSDownloadRecord(db.Model):
 
 
 class DSViewRecord(db.Model):
+    # Counting by dataset and date range and the (user, dataset, cookie) dedupe lookup are answered from the indexes
+    __table_args__ = (
+        db.Index("ix_ds_view_record_dataset_id_view_date", "dataset_id", "view_date"),
+        db.Index("ix_ds_view_record_dataset_id_cookie_user_id", "dataset_id", "view_cookie", "user_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id"))
@@ -194,6 +217,75 @@ class DSViewRecord(db.Model):
         return f"<View id={self.id} dataset_id={self.dataset_id} date={self.view_date} cookie={self.view_cookie}>"
 
 
+class DSDailyStats(db.Model):
+    """Views, unique viewers and downloads of a dataset on one day, rolled up from the raw records by `stats:rollup`."""
+
+    dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id", ondelete="CASCADE"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    unique_views = db.Column(db.Integer, nullable=False, default=0)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+    # HyperLogLog sketches of the distinct viewers and downloaders of the day, merged to count them over any window
+    viewers_sketch = db.Column(db.LargeBinary, nullable=True)
+    downloaders_sketch = db.Column(db.LargeBinary, nullable=True)
+
+    def to_dict(self):
+        return {
+            "day": self.day.isoformat(),
+            "views": self.views,
+            "unique_views": self.unique_views,
+            "downloads": self.downloads,
+        }
+
+
+class DSStatsRollupState(db.Model):
+    """Highest view and download record ids already folded into the daily rollups (a single row)."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    last_view_id = db.Column(db.Integer, nullable=False, default=0)
+    last_download_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DSProfile(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id", ondelete="CASCADE"), unique=True, nullable=False)
+    encoding = db.Column(db.String(20), nullable=False)
+    delimiter = db.Column(db.String(4), nullable=False)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    # One entry per column: name, type, null_count, min, max and distinct_estimate
+    columns = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    dataset = db.relationship("DataSet", backref=db.backref("profile", uselist=False, passive_deletes=True))
+
+    def column_names(self):
+        return [column["name"] for column in self.columns]
+
+    def __repr__(self):
+        return f"<Profile dataset_id={self.dataset_id} rows={self.row_count} columns={len(self.columns)}>"
+
+
+class DSSearchDocument(db.Model):
+    dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id", ondelete="CASCADE"), primary_key=True)
+    length = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SearchDocument dataset_id={self.dataset_id} length={self.length}>"
+
+
+class DSSearchTerm(db.Model):
+    __table_args__ = (db.Index("ix_ds_search_term_term_dataset_id", "term", "dataset_id"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id", ondelete="CASCADE"), nullable=False, index=True)
+    term = db.Column(db.String(64), nullable=False)
+    frequency = db.Column(db.Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<SearchTerm dataset_id={self.dataset_id} term={self.term} frequency={self.frequency}>"
+
+
 class DOIMapping(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     dataset_doi_old = db.Column(db.String(120))
@@ -1,15 +1,50 @@
 import logging
-from datetime import datetime, timezone
-from typing import Optional
+import math
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
 
+import unidecode
 from flask_login import current_user
-from sqlalchemy import desc, func
+from sqlalchemy import String, cast, desc, func, insert, or_, select, union_all
+from sqlalchemy.orm import contains_eager
 
-from app.modules.dataset.models import Author, DataSet, DOIMapping, DSDownloadRecord, DSMetaData, DSViewRecord, Community
+from app.modules.dataset.models import (
+    Author,
+    DataSet,
+    DOIMapping,
+    DSDailyStats,
+    DSDownloadRecord,
+    DSMetaData,
+    DSProfile,
+    DSSearchDocument,
+    DSSearchTerm,
+    DSStatsRollupState,
+    DSViewRecord,
+    Community,
+)
 from core.repositories.BaseRepository import BaseRepository
 
 logger = logging.getLogger(__name__)
 
+SEARCH_TERM_MAX_LENGTH = 64
+
+
+def with_metadata_and_authors(query):
+    """
+    Loads the metadata through the query's existing join with DSMetaData and all the authors in one extra query,
+    instead of two lazy loads per dataset when listing or serializing them.
+    """
+    return query.options(contains_eager(DataSet.ds_meta_data).selectinload(DSMetaData.authors))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Normalizes a text the same way for indexing and querying and splits it into search terms."""
+    if not text:
+        return []
+    normalized = unidecode.unidecode(text).lower()
+    return [token[:SEARCH_TERM_MAX_LENGTH] for token in re.findall(r"[a-z0-9][a-z0-9_\-]*", normalized)]
+
 
 class AuthorRepository(BaseRepository):
     def __init__(self):
@@ -21,6 +56,33 @@ class CommunityRepository(BaseRepository):
     def get_all_ordered_by_creation(self):
         return self.model.query.order_by(desc(self.model.created_at)).all()
 
+def existing_record_keys(model, cookie_column, keys: Iterable[tuple]) -> set:
+    """
+    Returns which of the (user_id, dataset_id, cookie) keys already have a record, with a single query for the whole
+    batch instead of one lookup per event.
+    """
+    keys = set(keys)
+    if not keys:
+        return set()
+    dataset_ids = {dataset_id for _, dataset_id, _ in keys}
+    cookies = {cookie for _, _, cookie in keys}
+    rows = record_keys_query(model, cookie_column, dataset_ids, cookies).all()
+    return keys & {tuple(row) for row in rows}
+
+
+def record_keys_query(model, cookie_column, dataset_ids: Iterable[int], cookies: Iterable[str]):
+    return model.query.with_entities(model.user_id, model.dataset_id, cookie_column).filter(
+        model.dataset_id.in_(dataset_ids), cookie_column.in_(cookies)
+    )
+
+
+def record_count_query(model, date_column, dataset_id: int, since: Optional[datetime] = None):
+    query = model.query.with_entities(func.count(model.id)).filter(model.dataset_id == dataset_id)
+    if since is not None:
+        query = query.filter(date_column >= since)
+    return query
+
+
 class DSDownloadRecordRepository(BaseRepository):
     def __init__(self):
         super().__init__(DSDownloadRecord)
@@ -29,6 +91,22 @@ class DSDownloadRecordRepository(BaseRepository):
         max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
         return max_id if max_id is not None else 0
 
+    def max_id(self) -> int:
+        """Highest record id currently visible, the watermark of the stats rollups."""
+        max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
+        return max_id if max_id is not None else 0
+
+    def existing_keys(self, keys: Iterable[tuple]) -> set:
+        return existing_record_keys(self.model, self.model.download_cookie, keys)
+
+    def count_for_dataset(self, dataset_id: int, since: Optional[datetime] = None) -> int:
+        return record_count_query(self.model, self.model.download_date, dataset_id, since).scalar()
+
+    def bulk_create(self, rows: List[dict]):
+        """Inserts the records in one multi-row INSERT, without committing."""
+        if rows:
+            self.session.execute(insert(self.model), rows)
+
 
 class DSMetaDataRepository(BaseRepository):
     def __init__(self):
@@ -46,6 +124,11 @@ class DSViewRecordRepository(BaseRepository):
         max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
         return max_id if max_id is not None else 0
 
+    def max_id(self) -> int:
+        """Highest record id currently visible, the watermark of the stats rollups."""
+        max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
+        return max_id if max_id is not None else 0
+
     def the_record_exists(self, dataset: DataSet, user_cookie: str):
         return self.model.query.filter_by(
             user_id=current_user.id if current_user.is_authenticated else None,
@@ -61,6 +144,132 @@ class DSViewRecordRepository(BaseRepository):
             view_cookie=user_cookie,
         )
 
+    def existing_keys(self, keys: Iterable[tuple]) -> set:
+        return existing_record_keys(self.model, self.model.view_cookie, keys)
+
+    def count_for_dataset(self, dataset_id: int, since: Optional[datetime] = None) -> int:
+        return record_count_query(self.model, self.model.view_date, dataset_id, since).scalar()
+
+    def bulk_create(self, rows: List[dict]):
+        """Inserts the records in one multi-row INSERT, without committing."""
+        if rows:
+            self.session.execute(insert(self.model), rows)
+
+
+def as_date(value) -> date:
+    """`func.date` returns a date on MariaDB but an ISO string on SQLite."""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+class DSDailyStatsRepository(BaseRepository):
+    """
+    Daily rollups of the view and download records. Each run only revisits the (dataset, day) pairs that received
+    records with an id above the stored watermark, recounting those days through the (dataset_id, date) indexes.
+    """
+
+    STATE_ID = 1
+
+    def __init__(self):
+        super().__init__(DSDailyStats)
+
+    def get_state(self) -> DSStatsRollupState:
+        state = self.session.get(DSStatsRollupState, self.STATE_ID)
+        if state is None:
+            state = DSStatsRollupState(id=self.STATE_ID, last_view_id=0, last_download_id=0)
+            self.session.add(state)
+        return state
+
+    def touched_days(self, model, date_column, after_id: int, up_to_id: int) -> Dict[int, set]:
+        rows = (
+            model.query.with_entities(model.dataset_id, func.date(date_column))
+            .filter(model.id > after_id, model.id <= up_to_id)
+            .distinct()
+            .all()
+        )
+        touched = {}
+        for dataset_id, day in rows:
+            touched.setdefault(dataset_id, set()).add(as_date(day))
+        return touched
+
+    def count_days(self, model, date_column, dataset_id: int, days: set, distinct_column=None) -> Dict[date, tuple]:
+        """Returns {day: (records, distinct visitors)} for the given days of one dataset."""
+        day_column = func.date(date_column)
+        columns = [day_column, func.count(model.id)]
+        if distinct_column is not None:
+            columns.append(func.count(func.distinct(func.coalesce(cast(model.user_id, String), distinct_column))))
+        start = datetime.combine(min(days), datetime.min.time())
+        end = datetime.combine(max(days) + timedelta(days=1), datetime.min.time())
+        rows = (
+            model.query.with_entities(*columns)
+            .filter(model.dataset_id == dataset_id, date_column >= start, date_column < end)
+            .group_by(day_column)
+            .all()
+        )
+        counts = {}
+        for row in rows:
+            day = as_date(row[0])
+            if day in days:
+                counts[day] = (row[1], row[2] if distinct_column is not None else 0)
+        return counts
+
+    def visitor_keys(self, model, date_column, cookie_column, after_id: int, up_to_id: int):
+        """Yields (dataset_id, day, visitor) for the records in the id range, the visitor being the user or cookie."""
+        rows = (
+            model.query.with_entities(model.dataset_id, func.date(date_column), model.user_id, cookie_column)
+            .filter(model.id > after_id, model.id <= up_to_id)
+            .yield_per(5000)
+        )
+        for dataset_id, day, user_id, cookie in rows:
+            yield dataset_id, as_date(day), f"user:{user_id}" if user_id is not None else f"cookie:{cookie}"
+
+    def sketches(self, dataset_ids: Iterable[int], since: Optional[date] = None, until: Optional[date] = None):
+        query = self.model.query.with_entities(self.model.viewers_sketch, self.model.downloaders_sketch).filter(
+            self.model.dataset_id.in_(list(dataset_ids))
+        )
+        if since is not None:
+            query = query.filter(self.model.day >= since)
+        if until is not None:
+            query = query.filter(self.model.day <= until)
+        return query.all()
+
+    def upsert(self, dataset_id: int, day: date, **values):
+        row = self.session.get(self.model, (dataset_id, day))
+        if row is None:
+            row = self.model(dataset_id=dataset_id, day=day, views=0, unique_views=0, downloads=0)
+            self.session.add(row)
+        for key, value in values.items():
+            setattr(row, key, value)
+        return row
+
+    def clear(self):
+        self.model.query.delete()
+        state = self.get_state()
+        state.last_view_id = 0
+        state.last_download_id = 0
+
+    def totals(self, dataset_id: int, since: Optional[date] = None) -> Dict[str, int]:
+        query = self.model.query.with_entities(
+            func.coalesce(func.sum(self.model.views), 0),
+            func.coalesce(func.sum(self.model.downloads), 0),
+        ).filter(self.model.dataset_id == dataset_id)
+        if since is not None:
+            query = query.filter(self.model.day >= since)
+        views, downloads = query.one()
+        return {"views": int(views), "downloads": int(downloads)}
+
+    def between(self, dataset_id: int, start: date, end: date) -> List[DSDailyStats]:
+        return (
+            self.model.query.filter(
+                self.model.dataset_id == dataset_id, self.model.day >= start, self.model.day <= end
+            )
+            .order_by(self.model.day)
+            .all()
+        )
+
 
 class DataSetRepository(BaseRepository):
     def __init__(self):
@@ -68,7 +277,7 @@ class DataSetRepository(BaseRepository):
 
     def get_synchronized(self, current_user_id: int) -> DataSet:
         return (
-            self.model.query.join(DSMetaData)
+            with_metadata_and_authors(self.model.query.join(DSMetaData))
             .filter(DataSet.user_id == current_user_id, DataSet.csv_file_path.isnot(None))
             .order_by(self.model.created_at.desc())
             .all()
@@ -76,7 +285,7 @@ class DataSetRepository(BaseRepository):
 
     def get_unsynchronized(self, current_user_id: int) -> DataSet:
         return (
-            self.model.query.join(DSMetaData)
+            with_metadata_and_authors(self.model.query.join(DSMetaData))
             .filter(DataSet.user_id == current_user_id, DataSet.csv_file_path.is_(None))
             .order_by(self.model.created_at.desc())
             .all()
@@ -93,6 +302,27 @@ class DataSetRepository(BaseRepository):
             .first()
         )
 
+    def increment_download_counts(self, counts: Dict[int, int]):
+        """Adds to the download counters in the database (download_count = download_count + n), without committing."""
+        for dataset_id, count in counts.items():
+            self.model.query.filter(DataSet.id == dataset_id).update(
+                {DataSet.download_count: DataSet.download_count + count}, synchronize_session=False
+            )
+
+    def get_missing_profile(self, force: bool = False):
+        query = self.model.query.filter(DataSet.csv_file_path.isnot(None))
+        if not force:
+            query = query.outerjoin(DSProfile, DSProfile.dataset_id == DataSet.id).filter(DSProfile.id.is_(None))
+        return query.all()
+
+    def get_missing_file_metadata(self, force: bool = False):
+        query = self.model.query.filter(DataSet.csv_file_path.isnot(None))
+        if not force:
+            query = query.filter(
+                or_(DataSet.size_bytes.is_(None), DataSet.checksum.is_(None), DataSet.checksum_sha256.is_(None))
+            )
+        return query.all()
+
     def count_synchronized_datasets(self):
         return self.model.query.join(DSMetaData).filter(DataSet.csv_file_path.isnot(None)).count()
 
@@ -101,7 +331,7 @@ class DataSetRepository(BaseRepository):
 
     def latest_synchronized(self):
         return (
-            self.model.query.join(DSMetaData)
+            with_metadata_and_authors(self.model.query.join(DSMetaData))
             .filter(DataSet.csv_file_path.isnot(None))
             .order_by(desc(self.model.id))
             .limit(5)
@@ -109,6 +339,123 @@ class DataSetRepository(BaseRepository):
         )
 
 
+class DSProfileRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(DSProfile)
+
+    def save_for_dataset(self, dataset_id: int, commit: bool = True, **kwargs) -> DSProfile:
+        profile = self.model.query.filter_by(dataset_id=dataset_id).first()
+        if profile is None:
+            return self.create(commit=commit, dataset_id=dataset_id, **kwargs)
+        for key, value in kwargs.items():
+            setattr(profile, key, value)
+        if commit:
+            self.session.commit()
+        return profile
+
+
+class DSSearchIndexRepository(BaseRepository):
+    """Inverted index over dataset metadata and authors, ranked with Okapi BM25."""
+
+    K1 = 1.2
+    B = 0.75
+    MIN_PREFIX_LENGTH = 3
+    MAX_PREFIX_TERMS = 50
+
+    def __init__(self):
+        super().__init__(DSSearchTerm)
+
+    def replace_document(self, dataset_id: int, term_frequencies: Dict[str, int]):
+        self.model.query.filter_by(dataset_id=dataset_id).delete(synchronize_session=False)
+        DSSearchDocument.query.filter_by(dataset_id=dataset_id).delete(synchronize_session=False)
+
+        self.session.add(DSSearchDocument(dataset_id=dataset_id, length=sum(term_frequencies.values())))
+        if term_frequencies:
+            self.session.execute(
+                insert(self.model),
+                [
+                    {"dataset_id": dataset_id, "term": term, "frequency": frequency}
+                    for term, frequency in term_frequencies.items()
+                ],
+            )
+        self.session.commit()
+
+    def remove_document(self, dataset_id: int):
+        self.model.query.filter_by(dataset_id=dataset_id).delete(synchronize_session=False)
+        DSSearchDocument.query.filter_by(dataset_id=dataset_id).delete(synchronize_session=False)
+        self.session.commit()
+
+    def expand(self, word: str) -> List[str]:
+        """
+        Index terms a query word matches. Words shorter than MIN_PREFIX_LENGTH only match themselves; longer ones match
+        the terms they prefix, capped to the MAX_PREFIX_TERMS found in most documents so that a broad prefix never
+        drags in an unbounded number of posting lists.
+        """
+        if len(word) < self.MIN_PREFIX_LENGTH:
+            return [word]
+        rows = (
+            self.session.query(self.model.term)
+            .filter(self.model.term.startswith(word, autoescape=True))
+            .group_by(self.model.term)
+            .order_by(func.count().desc(), self.model.term)
+            .limit(self.MAX_PREFIX_TERMS)
+            .all()
+        )
+        return [term for (term,) in rows]
+
+    def scores(self, words: Iterable[str]):
+        """
+        Returns a (dataset_id, score) subquery with the BM25 score of the documents matching any of the words, to be
+        joined, ordered and limited by the database, or None if no word matches a term.
+
+        Only the postings of the matched terms are read, through the (term, dataset_id) index. Scores are rounded so
+        that the same query scores a document the same way when it is compared with a pagination cursor.
+        """
+        words = list(dict.fromkeys(word[:SEARCH_TERM_MAX_LENGTH] for word in words if word))
+        total_documents, average_length = self.session.query(
+            func.count(DSSearchDocument.dataset_id), func.avg(DSSearchDocument.length)
+        ).one()
+        average_length = float(average_length or 1)
+        norm = self.K1 * (1 - self.B + self.B * DSSearchDocument.length / average_length)
+
+        selects = []
+        for word in words:
+            terms = self.expand(word)
+            matches = (
+                select(self.model.dataset_id, func.sum(self.model.frequency).label("frequency"))
+                .where(self.model.term.in_(terms))
+                .group_by(self.model.dataset_id)
+                .subquery()
+            )
+            document_frequency = self.session.scalar(select(func.count()).select_from(matches))
+            if not document_frequency:
+                continue
+
+            idf = math.log(1 + (total_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+            score = idf * (self.K1 + 1) * matches.c.frequency / (matches.c.frequency + norm)
+            selects.append(
+                select(matches.c.dataset_id, score.label("score"))
+                .select_from(matches)
+                .join(DSSearchDocument, DSSearchDocument.dataset_id == matches.c.dataset_id)
+            )
+
+        if not selects:
+            return None
+        partial = union_all(*selects).subquery() if len(selects) > 1 else selects[0].subquery()
+        return (
+            select(partial.c.dataset_id, func.round(func.sum(partial.c.score), 6).label("score"))
+            .group_by(partial.c.dataset_id)
+            .subquery()
+        )
+
+    def search(self, words: Iterable[str]) -> Dict[int, float]:
+        """Returns a {dataset_id: score} map of the documents containing any of the words (see `scores`)."""
+        scores = self.scores(words)
+        if scores is None:
+            return {}
+        return {dataset_id: float(score) for dataset_id, score in self.session.execute(select(scores))}
+
+
 class DOIMappingRepository(BaseRepository):
     def __init__(self):
         super().__init__(DOIMapping)
@@ -1,22 +1,19 @@
-import json
 import logging
 import os
 import shutil
-import tempfile
 import uuid
-import pandas as pd
-from datetime import datetime, timezone, timedelta
-from zipfile import ZipFile
+from datetime import date, datetime, timezone, timedelta
 from werkzeug.utils import secure_filename
 
 from flask import (
+    Response,
     abort,
     jsonify,
     make_response,
     redirect,
     render_template,
     request,
-    send_from_directory,
+    stream_with_context,
     url_for,
     flash,
     current_app,
@@ -26,17 +23,25 @@ from flask_login import current_user, login_required
 from app.modules.dataset import dataset_bp
 from app import db
 from app.modules.dataset.forms import DataSetForm, CommunityForm, CommunityDatasetForm
-from app.modules.dataset.models import DSDownloadRecord, DSMetaData, DataSet, DSViewRecord, Author
+from app.modules.dataset.models import DSMetaData, DataSet, Author
 from app.modules.dataset.services import (
     AuthorService,
     DataSetService,
     DOIMappingService,
-    DSDownloadRecordService,
     DSMetaDataService,
+    DSSearchIndexService,
+    DSStatsRollupService,
     DSViewRecordService,
     CommunityService,
+    CSVPreviewService,
+    CSVProfileService,
+    DatasetArchiveCache,
+    FileDeliveryService,
+    get_event_buffer,
+    save_file_with_checksums,
+    stream_zip,
 )
-from app.modules.zenodo.services import ZenodoService
+from app.modules.zenodo.services import ZenodoJobService
 
 logger = logging.getLogger(__name__)
 
@@ -44,10 +49,14 @@ logger = logging.getLogger(__name__)
 dataset_service = DataSetService()
 author_service = AuthorService()
 dsmetadata_service = DSMetaDataService()
-zenodo_service = ZenodoService()
+zenodo_job_service = ZenodoJobService()
 doi_mapping_service = DOIMappingService()
 ds_view_record_service = DSViewRecordService()
+stats_rollup_service = DSStatsRollupService()
 community_service = CommunityService()
+search_index_service = DSSearchIndexService()
+csv_preview_service = CSVPreviewService()
+csv_profile_service = CSVProfileService()
 
 
 @dataset_bp.route("/dataset/upload", methods=["GET", "POST"])
@@ -61,19 +70,8 @@ def create_dataset():
         upload_to_zenodo = request.form.get('upload_to_zenodo') == 'true'
         
         try:
-            # --- FIX HERE: robust CSV reading ---
-            f.seek(0) 
-            try:
-                df = pd.read_csv(f, encoding='utf-8', sep=None, engine='python')
-            except Exception:
-                f.seek(0)
-                df = pd.read_csv(f, encoding='latin-1', sep=None, engine='python')
-            
-            csv_row_count = len(df)
-            csv_column_names = ','.join(list(df.columns))
-            
             f.seek(0)
-            
+
             metadata_dict = form.get_dsmetadata()
             meta_data = DSMetaData(**metadata_dict)
             
@@ -84,8 +82,6 @@ def create_dataset():
             dataset = DataSet(
                 user_id=current_user.id,
                 ds_meta_data=meta_data,
-                row_count=csv_row_count,
-                column_names=csv_column_names,
             )
             
             db.session.add(meta_data)
@@ -100,9 +96,14 @@ def create_dataset():
             )
             os.makedirs(dataset_folder, exist_ok=True)
             file_path = os.path.join(dataset_folder, filename)
-            f.save(file_path)
+            checksum, checksum_sha256, size = save_file_with_checksums(f, file_path)
 
             dataset.csv_file_path = file_path
+            dataset.checksum = checksum
+            dataset.checksum_sha256 = checksum_sha256
+            dataset.size_bytes = size
+            # Row count, column names, per-column profile and preview come from one chunked pass over the file
+            csv_profile_service.try_profile_dataset(dataset)
             db.session.commit()
             
             logger.info(f"CSV dataset created: {dataset.id}")
@@ -113,41 +114,21 @@ def create_dataset():
             flash(f"Error creating local dataset: {exc}", "danger")
             return render_template("dataset/upload_dataset.html", form=form)
 
-        
-        deposition_doi = None 
+        try:
+            search_index_service.index_dataset(dataset)
+        except Exception as exc:
+            db.session.rollback()
+            logger.exception(f"Could not index dataset {dataset.id} for search: {exc}")
+
         if upload_to_zenodo:
+            # The deposition runs in the `rosemary zenodo:worker` process; the upload returns right away
             try:
-                zenodo_response_json = zenodo_service.create_new_deposition(dataset)
-                data = json.loads(json.dumps(zenodo_response_json))
-                if data.get("conceptrecid") and data.get("id"):
-                    deposition_id = data.get("id")
-                    dataset_service.update_dsmetadata(dataset.ds_meta_data_id, deposition_id=deposition_id)
-                    logger.info(f"Uploading {file_path} to Zenodo (Deposition ID: {deposition_id})...")
-                    zenodo_service.upload_file(dataset, deposition_id, file_path, filename)
-                    zenodo_service.publish_deposition(deposition_id)
-
-                    deposition_doi = zenodo_service.get_doi(deposition_id)
-                    if deposition_doi:
-                        dataset_service.update_dsmetadata(dataset.ds_meta_data_id, dataset_doi=deposition_doi)
-                        logger.info(f"Dataset {dataset.id} published on Zenodo with DOI {deposition_doi}")
-                        flash('Your Beer-Dataset has been uploaded and published on Zenodo!', 'success')
-                    else:
-                        logger.error(f"DOI not found after publishing deposition {deposition_id} for dataset {dataset.id}")
-                        flash('Dataset created locally, but DOI retrieval from Zenodo failed.', 'warning')
-                else:
-                    logger.error(f"Zenodo deposition creation failed for dataset {dataset.id}: {data}")
-                    flash('Dataset created locally, but connection with Zenodo failed.', 'warning')        
+                zenodo_job_service.enqueue(dataset)
+                flash('Your Beer-Dataset has been created and queued for publication on Zenodo.', 'success')
             except Exception as exc:
-                msg = f"Dataset created locally (id: {dataset.id}), but Zenodo synchronization failed: {exc}"
-                logger.exception(msg)
-                flash(msg, 'warning')
-
-                # --- INYECCIÓN DEL DOI SIMULADO ---
-                temp_id = str(uuid.uuid4()).split('-')[0]
-                deposition_doi = f"10.9999/test-doi.{dataset.id}.{temp_id}"
-                dataset_service.update_dsmetadata(dataset.ds_meta_data_id, dataset_doi=deposition_doi)
-                db.session.commit()
-                logger.warning(f"ZENODO FAILED (403). Using SIMULATED DOI: {deposition_doi}")
+                db.session.rollback()
+                logger.exception(f"Could not queue dataset {dataset.id} for Zenodo: {exc}")
+                flash(f"Dataset created locally (id: {dataset.id}), but it could not be queued for Zenodo.", 'warning')
 
         db.session.refresh(dataset.ds_meta_data)
         final_doi = dataset.ds_meta_data.dataset_doi
@@ -234,53 +215,65 @@ def download_dataset(dataset_id):
         except Exception:
             return redirect(url_for('dataset.list_dataset'))
 
-    temp_dir = tempfile.mkdtemp()
-    zip_path = os.path.join(temp_dir, f"dataset_{dataset_id}.zip")
+    file_delivery = FileDeliveryService(current_app.config)
+    last_modified = os.path.getmtime(dataset.csv_file_path)
 
-    with ZipFile(zip_path, "w") as zipf:
-        filename = os.path.basename(dataset.csv_file_path)
-        zipf.write(dataset.csv_file_path, arcname=filename)
+    if request.args.get("format") == "csv":
+        # Raw file: byte ranges let interrupted or segmented downloads resume; the SHA-256 is a strong ETag
+        resp = file_delivery.send(
+            dataset.csv_file_path,
+            mimetype="text/csv",
+            as_attachment=True,
+            download_name=os.path.basename(dataset.csv_file_path),
+            conditional=True,
+            etag=dataset.checksum_sha256 or dataset.checksum or True,
+            last_modified=last_modified,
+        )
+    else:
+        download_name = f"dataset_{dataset_id}.zip"
+        archive_path = None
+        if dataset.checksum:
+            try:
+                archive_path = DatasetArchiveCache.from_config(current_app.config).get_archive(dataset)
+            except OSError as exc:
+                logger.warning(f"Could not use the archive cache for dataset {dataset_id}: {exc}")
 
-    user_cookie = request.cookies.get("download_cookie")
-    if not user_cookie:
-        user_cookie = str(uuid.uuid4())
-        resp = make_response(
-            send_from_directory(
-                temp_dir,
-                f"dataset_{dataset_id}.zip",
+        if archive_path:
+            resp = file_delivery.send(
+                archive_path,
+                mimetype="application/zip",
                 as_attachment=True,
+                download_name=download_name,
+                conditional=True,
+                etag=DatasetArchiveCache.etag(dataset),
+                last_modified=last_modified,
+            )
+        else:
+            # Datasets without a checksum yet are zipped on the fly, so there is no stable body to take ranges of
+            filename = os.path.basename(dataset.csv_file_path)
+            resp = Response(
+                stream_with_context(stream_zip([(dataset.csv_file_path, filename)])),
                 mimetype="application/zip",
+                headers={"Content-Disposition": f'attachment; filename="{download_name}"', "Accept-Ranges": "none"},
+                direct_passthrough=True,
             )
-        )
+
+    user_cookie = request.cookies.get("download_cookie")
+    if not user_cookie:
+        user_cookie = str(uuid.uuid4())
         resp.set_cookie("download_cookie", user_cookie)
-    else:
-        resp = send_from_directory(
-            temp_dir,
-            f"dataset_{dataset_id}.zip",
-            as_attachment=True,
-            mimetype="application/zip",
-        )
 
-    existing_record = DSDownloadRecord.query.filter_by(
-        user_id=current_user.id if current_user.is_authenticated else None,
-        dataset_id=dataset_id,
-        download_cookie=user_cookie,
-    ).first()
-
-    if not existing_record:
-        DSDownloadRecordService().create(
-            user_id=current_user.id if current_user.is_authenticated else None,
-            dataset_id=dataset_id,
-            download_date=datetime.now(timezone.utc),
-            download_cookie=user_cookie,
-        )
-        
-        try:
-            dataset.download_count += 1
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            print(f"Error incrementing download counter: {e}")
+    if resp.status_code == 304:
+        # The client already has this archive; revalidation is not a new download
+        return resp
+    if request.range and request.range.ranges and request.range.ranges[0][0] != 0:
+        # Resumed or segmented transfers only count through the request for the first byte
+        return resp
+
+    # Stored in batches with the download counter by the write-behind buffer, off the request path
+    get_event_buffer().record_download(
+        dataset_id, current_user.id if current_user.is_authenticated else None, user_cookie
+    )
 
     return resp
 
@@ -289,22 +282,22 @@ def download_dataset(dataset_id):
 def get_dataset_stats(dataset_id):
     dataset = dataset_service.get_or_404(dataset_id)
 
-    total_views = DSViewRecord.query.filter_by(dataset_id=dataset_id).count()
-    total_downloads = dataset.download_count
+    # Counts come from the daily rollups, so they lag the raw records until the next stats:rollup run
+    totals = stats_rollup_service.totals(dataset_id)
+    total_views = totals["views"]
+    total_downloads = totals["downloads"]
     dataset_age_in_days = (datetime.now(timezone.utc).replace(tzinfo=None) - dataset.created_at).days
     authors_number = len(dataset.ds_meta_data.authors)
     filas_count = dataset.row_count or 0
     columnas_count = len(dataset.column_names.split(',')) if dataset.column_names else 0
-    seven_days_ago = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=7)
+    seven_days_ago = datetime.now(timezone.utc).date() - timedelta(days=6)
     download_rate = 0
     if total_views > 0:
         download_rate = round((total_downloads / total_views) * 100, 2)
-    views_last_week = DSViewRecord.query.filter(
-        DSViewRecord.dataset_id == dataset_id,
-        DSViewRecord.view_date >= seven_days_ago).count()
-    downloads_last_week = DSDownloadRecord.query.filter(
-        DSDownloadRecord.dataset_id == dataset_id,
-        DSDownloadRecord.download_date >= seven_days_ago).count()
+    last_week = stats_rollup_service.totals(dataset_id, since=seven_days_ago)
+    views_last_week = last_week["views"]
+    downloads_last_week = last_week["downloads"]
+    visitors_last_week = stats_rollup_service.unique_visitors([dataset_id], since=seven_days_ago)
 
     return render_template(
         "dataset/statistics.html",
@@ -317,10 +310,31 @@ def get_dataset_stats(dataset_id):
         columnas_count=columnas_count,
         download_rate=download_rate,
         views_last_week=views_last_week,
-        downloads_last_week=downloads_last_week
+        downloads_last_week=downloads_last_week,
+        unique_viewers_last_week=visitors_last_week["unique_viewers"],
+        unique_downloaders_last_week=visitors_last_week["unique_downloaders"],
+        profile=dataset.profile,
     )
 
 
+@dataset_bp.route("/dataset/<int:dataset_id>/stats/timeseries", methods=["GET"])
+def get_dataset_stats_timeseries(dataset_id):
+    dataset = dataset_service.get_or_404(dataset_id)
+    days = request.args.get("days", 30, type=int)
+    series = stats_rollup_service.timeseries(dataset.id, days)
+    visitors = stats_rollup_service.unique_visitors([dataset.id], since=date.fromisoformat(series[0]["day"]))
+    return jsonify({"dataset_id": dataset.id, "days": series, **visitors}), 200
+
+
+@dataset_bp.route("/dataset/<int:dataset_id>/zenodo/status", methods=["GET"])
+def get_zenodo_status(dataset_id):
+    dataset = dataset_service.get_or_404(dataset_id)
+    job = zenodo_job_service.get_by_dataset(dataset.id)
+    if job is None:
+        return jsonify({"message": "Dataset not queued for Zenodo"}), 404
+    return jsonify({**job.to_dict(), "dataset_doi": dataset.ds_meta_data.dataset_doi}), 200
+
+
 @dataset_bp.route("/doi/<path:doi>/", methods=["GET"])
 def subdomain_index(doi):
     new_doi = doi_mapping_service.get_new_doi(doi)
@@ -342,19 +356,9 @@ def subdomain_index(doi):
         if not user_cookie:
             user_cookie = str(uuid.uuid4())
         
-        existing_record = DSViewRecord.query.filter_by(
-            user_id=current_user.id if current_user.is_authenticated else None,
-            dataset_id=dataset.id,
-            view_cookie=user_cookie,
-        ).first()
-
-        if not existing_record:
-            ds_view_record_service.create( 
-                user_id=current_user.id if current_user.is_authenticated else None,
-                dataset_id=dataset.id,
-                view_date=datetime.now(timezone.utc),
-                view_cookie=user_cookie,
-            )
+        get_event_buffer().record_view(
+            dataset.id, current_user.id if current_user.is_authenticated else None, user_cookie
+        )
     except Exception as e:
         logger.warning(f"Could not save view record for dataset {dataset.id}: {e}")
 
@@ -362,14 +366,10 @@ def subdomain_index(doi):
     csv_header = []
     csv_preview = []
     try:
-        if dataset.csv_file_path and os.path.exists(dataset.csv_file_path):
-            try:
-                df = pd.read_csv(dataset.csv_file_path, encoding='utf-8', sep=None, engine='python')
-            except Exception:
-                df = pd.read_csv(dataset.csv_file_path, encoding='latin-1', sep=None, engine='python')
-            
-            csv_header = df.columns.tolist()
-            csv_preview = df.head(10).values.tolist()
+        preview = csv_preview_service.get_preview(dataset)
+        if preview:
+            csv_header = preview["header"]
+            csv_preview = preview["rows"]
     except Exception as e:
         logger.exception(f"CSV preview generation failed for {dataset.id}: {e}")
         pass 
@@ -405,19 +405,9 @@ def get_unsynchronized_dataset(dataset_id):
         if not user_cookie:
             user_cookie = str(uuid.uuid4())
         
-        existing_record = DSViewRecord.query.filter_by(
-            user_id=current_user.id if current_user.is_authenticated else None,
-            dataset_id=dataset.id,
-            view_cookie=user_cookie,
-        ).first()
-
-        if not existing_record:
-            ds_view_record_service.create( 
-                user_id=current_user.id if current_user.is_authenticated else None,
-                dataset_id=dataset.id,
-                view_date=datetime.now(timezone.utc),
-                view_cookie=user_cookie,
-            )
+        get_event_buffer().record_view(
+            dataset.id, current_user.id if current_user.is_authenticated else None, user_cookie
+        )
     except Exception as e:
         logger.warning(f"Could not save view record for dataset {dataset.id}: {e}")
  
@@ -425,14 +415,10 @@ def get_unsynchronized_dataset(dataset_id):
     csv_header = []
     csv_preview = []
     try:
-        if dataset.csv_file_path and os.path.exists(dataset.csv_file_path):
-            try:
-                df = pd.read_csv(dataset.csv_file_path, encoding='utf-8', sep=None, engine='python')
-            except Exception:
-                df = pd.read_csv(dataset.csv_file_path, encoding='latin-1', sep=None, engine='python')
-
-            csv_header = df.columns.tolist()
-            csv_preview = df.head(10).values.tolist()
+        preview = csv_preview_service.get_preview(dataset)
+        if preview:
+            csv_header = preview["header"]
+            csv_preview = preview["rows"]
     except Exception as e:
         logger.exception(f"CSV preview generation failed for {dataset.id}: {e}")
         pass 
@@ -491,6 +477,16 @@ def view_community(community_id):
     return render_template("community/view_community.html", community=community)
 
 
+@dataset_bp.route("/community/<int:community_id>/stats", methods=["GET"])
+def get_community_stats(community_id):
+    community = community_service.get_or_404(community_id)
+    days = request.args.get("days", 30, type=int)
+    since = datetime.now(timezone.utc).date() - timedelta(days=max(1, days) - 1)
+    dataset_ids = [dataset_id for (dataset_id,) in community.datasets.with_entities(DataSet.id)]
+    visitors = stats_rollup_service.unique_visitors(dataset_ids, since=since)
+    return jsonify({"community_id": community.id, "since": since.isoformat(), **visitors}), 200
+
+
 @dataset_bp.route("/communities/", methods=["GET"])
 def list_communities():
     """Shows a list of all created communities."""
@@ -514,11 +510,7 @@ def serve_community_logo(community_id):
     if not full_path or not os.path.exists(full_path):
         return redirect(url_for('static', filename='images/default_community_logo.png'))
 
-    working_dir = os.getenv("WORKING_DIR", os.path.join(os.getcwd(), "tmp_uploads")) 
-    directory = os.path.dirname(full_path)
-    filename = os.path.basename(full_path) 
-    
-    return send_from_directory(directory, filename)
+    return FileDeliveryService(current_app.config).send(full_path)
 
 
 @dataset_bp.route("/community/<int:community_id>/manage_datasets", methods=["GET", "POST"])
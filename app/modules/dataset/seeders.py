@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 
 from app.modules.auth.models import User
 from app.modules.dataset.models import Author, DataSet, DSMetaData, PublicationType
+from app.modules.dataset.services import CSVProfileService, DSSearchIndexService, calculate_checksums_and_size
 from core.seeders.BaseSeeder import BaseSeeder
 from app import db
 
@@ -127,6 +128,8 @@ class DataSetSeeder(BaseSeeder):
                 
                 # Actualizar la base de datos con la ruta real del archivo
                 dataset.csv_file_path = file_path
+                dataset.checksum, dataset.checksum_sha256, dataset.size_bytes = calculate_checksums_and_size(file_path)
+                CSVProfileService().profile_dataset(dataset, commit=False)
                 db.session.commit()
                 
                 logger.info(f"Creado archivo CSV de prueba para dataset {dataset.id} en: {file_path}")
@@ -136,4 +139,9 @@ class DataSetSeeder(BaseSeeder):
                 # No hacemos rollback aquí para no perder los datos insertados, 
                 # pero logueamos el error de archivo.
 
+        # 6. Indexar los datasets para la búsqueda de explore
+        search_index_service = DSSearchIndexService()
+        for dataset in seeded_datasets:
+            search_index_service.index_dataset(dataset)
+
         logger.info("DataSetSeeder para CervezaCsvHub completado.")
\ No newline at end of file
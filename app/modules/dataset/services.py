@@ -1,22 +1,40 @@
+import atexit
+import codecs
+import csv
 import hashlib
+import json
 import logging
+import math
+import mimetypes
 import os
 import shutil
+import threading
+import time
 import uuid
+import zlib
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+from urllib.parse import quote
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
 
-from flask import request
+from flask import Response, current_app, request, send_file
+from flask_login import current_user
 
 from app.modules.auth.services import AuthenticationService
-from app.modules.dataset.models import DataSet, DSMetaData, DSViewRecord, Community
+from app.modules.dataset.models import DataSet, DSDownloadRecord, DSMetaData, DSViewRecord, Community
 from app.modules.dataset.repositories import (
     AuthorRepository,
     DataSetRepository,
     DOIMappingRepository,
+    DSDailyStatsRepository,
     DSDownloadRecordRepository,
     DSMetaDataRepository,
+    DSProfileRepository,
+    DSSearchIndexRepository,
     DSViewRecordRepository,
     CommunityRepository,
+    tokenize,
 )
 
 from core.services.BaseService import BaseService
@@ -70,13 +88,134 @@ class CommunityService(BaseService):
         community = self.get_or_404(community_id)
         community.datasets = new_datasets 
         self.repository.session.commit()
-    
-def calculate_checksum_and_size(file_path):
-    file_size = os.path.getsize(file_path)
+
+
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_stream(source, destination=None):
+    """
+    Reads a binary stream in fixed-size chunks, feeding MD5 and SHA-256 and optionally copying it to destination,
+    so a file of any size is hashed (and written) in a single pass with bounded memory.
+
+    Returns:
+        tuple: (md5 hex digest, sha256 hex digest, size in bytes)
+    """
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: source.read(CHECKSUM_CHUNK_SIZE), b""):
+        md5.update(chunk)
+        sha256.update(chunk)
+        size += len(chunk)
+        if destination is not None:
+            destination.write(chunk)
+    return md5.hexdigest(), sha256.hexdigest(), size
+
+
+def calculate_checksums_and_size(file_path):
+    with open(file_path, "rb") as file:
+        return hash_stream(file)
+
+
+def save_file_with_checksums(file_storage, file_path):
+    """Writes an uploaded file to disk while hashing it, instead of saving it and reading it back."""
+    file_storage.stream.seek(0)
+    with open(file_path, "wb") as destination:
+        return hash_stream(file_storage.stream, destination)
+
+
+ZIP_COMPRESSION = ZIP_STORED if os.getenv("DATASET_ZIP_COMPRESSION", "deflate").lower() == "stored" else ZIP_DEFLATED
+# Entries get a fixed timestamp and mode, so the archive of a file is byte-identical whenever it is built and its
+# ETag (the checksum of the file) always describes the same bytes
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_FILE_MODE = 0o644
+
+
+class _ZipStreamSink:
+    """
+    Write-only, unseekable target for ZipFile. Without seek ZipFile writes each entry followed by a data descriptor,
+    so the archive can be handed out in pieces as it is produced.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(files, compression=ZIP_COMPRESSION):
+    """
+    Generates a ZIP archive of the given (path, arcname) pairs chunk by chunk, reading every file in
+    CHECKSUM_CHUNK_SIZE blocks, so no temporary archive is written and memory stays bounded whatever the file size.
+    """
+    sink = _ZipStreamSink()
+    with ZipFile(sink, "w", compression=compression) as archive:
+        for file_path, arcname in files:
+            info = ZipInfo(arcname, date_time=ZIP_DATE_TIME)
+            info.external_attr = ZIP_FILE_MODE << 16
+            info.compress_type = compression
+            with open(file_path, "rb") as source, archive.open(info, "w") as entry:
+                for chunk in iter(lambda: source.read(CHECKSUM_CHUNK_SIZE), b""):
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+    yield sink.drain()
+
+
+CSV_SNIFF_BYTES = 64 * 1024
+CSV_DELIMITERS = ",;\t|"
+
+
+def sniff_csv_sample(sample: bytes, truncated: bool = False):
+    """
+    Detects the encoding and delimiter of a CSV from a prefix of its bytes.
+
+    Returns:
+        tuple: (encoding, delimiter)
+    """
+    if truncated and b"\n" in sample:
+        # Do not sniff a truncated last line (or a multibyte character cut in half)
+        sample = sample[: sample.rfind(b"\n") + 1]
+
+    if sample.startswith(codecs.BOM_UTF8):
+        encoding = "utf-8-sig"
+    else:
+        encoding = "utf-8"
+    try:
+        text = sample.decode(encoding)
+    except UnicodeDecodeError:
+        encoding = "latin-1"
+        text = sample.decode(encoding)
+
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        delimiter = ","
+    return encoding, delimiter
+
+
+def sniff_csv_format(file_path):
+    """Detects the encoding and delimiter of a CSV file from a small prefix instead of parsing the whole file."""
     with open(file_path, "rb") as file:
-        content = file.read()
-        hash_md5 = hashlib.md5(content).hexdigest()
-        return hash_md5, file_size
+        sample = file.read(CSV_SNIFF_BYTES)
+    return sniff_csv_sample(sample, truncated=len(sample) == CSV_SNIFF_BYTES)
 
 
 class DataSetService(BaseService):
@@ -146,17 +285,16 @@ class DataSetService(BaseService):
                 filename = secure_filename(csv_file_data.filename)
                 csv_file_path = os.path.join(dataset_upload_dir, filename)
 
-                # Guardar el archivo en el disco
-                csv_file_data.seek(0)
-                csv_file_data.save(csv_file_path)
-                
-                # Calcular Checksum y Tamaño
-                checksum, size = calculate_checksum_and_size(csv_file_path)
+                # Guardar el archivo en el disco calculando checksums y tamaño en la misma pasada
+                checksum, checksum_sha256, size = save_file_with_checksums(csv_file_data, csv_file_path)
 
                 # Actualizar el objeto DataSet con la metadata del archivo CSV
                 dataset.csv_file_path = csv_file_path
                 dataset.checksum = checksum
-                dataset.size = size
+                dataset.checksum_sha256 = checksum_sha256
+                dataset.size_bytes = size
+                # Perfil, número de filas, columnas y vista previa en una sola pasada por bloques
+                CSVProfileService().try_profile_dataset(dataset)
                 # Se establece el nombre del dataset basado en el nombre del archivo subido
                 dataset.name = filename 
             # FIN MANEJO CSV
@@ -168,26 +306,93 @@ class DataSetService(BaseService):
             self.repository.session.rollback()
             # para no registrar el dataset en la DB.
             raise exc
+
+        DSSearchIndexService().index_dataset(dataset)
         return dataset
 
 
+    def backfill_file_metadata(self, force: bool = False) -> int:
+        """Stores the size and checksum of the CSV files of the datasets that do not have them yet."""
+        datasets = self.repository.get_missing_file_metadata(force)
+        updated = 0
+        for dataset in datasets:
+            if not os.path.exists(dataset.csv_file_path):
+                logger.warning(f"CSV file of dataset {dataset.id} not found at {dataset.csv_file_path}")
+                continue
+            dataset.checksum, dataset.checksum_sha256, dataset.size_bytes = calculate_checksums_and_size(
+                dataset.csv_file_path
+            )
+            updated += 1
+        self.repository.session.commit()
+        return updated
+
+    def backfill_profiles(self, force: bool = False) -> int:
+        """Profiles the CSV files of the datasets that do not have a stored profile yet."""
+        profile_service = CSVProfileService()
+        profiled = 0
+        for dataset in self.repository.get_missing_profile(force):
+            if not dataset.csv_file_path or not os.path.exists(dataset.csv_file_path):
+                logger.warning(f"CSV file of dataset {dataset.id} not found at {dataset.csv_file_path}")
+                continue
+            try:
+                profile_service.profile_dataset(dataset, commit=False)
+            except Exception as exc:
+                logger.warning(f"Could not profile dataset {dataset.id}: {exc}")
+                continue
+            profiled += 1
+        self.repository.session.commit()
+        return profiled
+
     def update_dsmetadata(self, id, **kwargs):
-        return self.dsmetadata_repository.update(id, **kwargs)
+        dsmetadata = self.dsmetadata_repository.update(id, **kwargs)
+        if dsmetadata and dsmetadata.data_set and {"title", "description", "tags", "authors"} & kwargs.keys():
+            DSSearchIndexService().index_dataset(dsmetadata.data_set)
+        return dsmetadata
 
-    def get_uvlhub_doi(self, dataset: DataSet) -> str:
+    @staticmethod
+    def get_uvlhub_doi(dataset: DataSet) -> str:
         domain = os.getenv("DOMAIN", "localhost")
         return f"http://{domain}/doi/{dataset.ds_meta_data.dataset_doi}"
 
 
 class AuthorService(BaseService):
+    """Author names, affiliations and ORCIDs are searchable, so every change reindexes the author's dataset."""
+
     def __init__(self):
         super().__init__(AuthorRepository())
 
+    def create(self, **kwargs):
+        author = super().create(**kwargs)
+        self._reindex(author.ds_meta_data_id)
+        return author
+
+    def update(self, id, **kwargs):
+        author = super().update(id, **kwargs)
+        if author:
+            self._reindex(author.ds_meta_data_id)
+        return author
+
+    def delete(self, id):
+        author = self.get_by_id(id)
+        ds_meta_data_id = author.ds_meta_data_id if author else None
+        deleted = super().delete(id)
+        if deleted:
+            self._reindex(ds_meta_data_id)
+        return deleted
+
+    def _reindex(self, ds_meta_data_id):
+        metadata = self.repository.session.get(DSMetaData, ds_meta_data_id) if ds_meta_data_id else None
+        if metadata and metadata.data_set:
+            DSSearchIndexService().index_dataset(metadata.data_set)
+
 
 class DSDownloadRecordService(BaseService):
     def __init__(self):
         super().__init__(DSDownloadRecordRepository())
 
+    def count_for_dataset(self, dataset_id: int, since=None) -> int:
+        return self.repository.count_for_dataset(dataset_id, since)
+
 
 class DSMetaDataService(BaseService):
     def __init__(self):
@@ -210,20 +415,337 @@ class DSViewRecordService(BaseService):
     def create_new_record(self, dataset: DataSet, user_cookie: str) -> DSViewRecord:
         return self.repository.create_new_record(dataset, user_cookie)
 
+    def count_for_dataset(self, dataset_id: int, since=None) -> int:
+        return self.repository.count_for_dataset(dataset_id, since)
+
     def create_cookie(self, dataset: DataSet) -> str:
 
         user_cookie = request.cookies.get("view_cookie")
         if not user_cookie:
             user_cookie = str(uuid.uuid4())
 
-        existing_record = self.the_record_exists(dataset=dataset, user_cookie=user_cookie)
-
-        if not existing_record:
-            self.create_new_record(dataset=dataset, user_cookie=user_cookie)
+        get_event_buffer().record_view(
+            dataset.id, current_user.id if current_user.is_authenticated else None, user_cookie
+        )
 
         return user_cookie
 
 
+class DSEventBuffer:
+    """
+    Write-behind buffer for view and download records. Hits are deduplicated in memory by (user, dataset, cookie) and
+    written every TRACKING_FLUSH_INTERVAL seconds by a background thread: one query skips the keys already stored, one
+    multi-row INSERT per record type adds the rest and each dataset gets a single atomic download_count increment.
+    Pending events are flushed when the process exits. With TRACKING_WRITE_BEHIND off every hit is flushed at once.
+    """
+
+    _instances_lock = threading.Lock()
+
+    def __init__(self, app, interval: float = 5.0, max_pending: int = 1000, write_behind: bool = True):
+        self.app = app
+        self.interval = interval
+        self.max_pending = max_pending
+        self.write_behind = write_behind
+        self._views = {}
+        self._downloads = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        atexit.register(self.flush)
+
+    @classmethod
+    def for_app(cls, app) -> "DSEventBuffer":
+        with cls._instances_lock:
+            buffer = app.extensions.get("dataset_event_buffer")
+            if buffer is None:
+                buffer = cls(
+                    app,
+                    interval=app.config.get("TRACKING_FLUSH_INTERVAL", 5.0),
+                    max_pending=app.config.get("TRACKING_BUFFER_MAX", 1000),
+                    write_behind=app.config.get("TRACKING_WRITE_BEHIND", True),
+                )
+                app.extensions["dataset_event_buffer"] = buffer
+            return buffer
+
+    def record_view(self, dataset_id: int, user_id: Optional[int], cookie: str):
+        row = {
+            "user_id": user_id,
+            "dataset_id": dataset_id,
+            "view_date": datetime.now(timezone.utc),
+            "view_cookie": cookie,
+        }
+        self._record(self._views, (user_id, dataset_id, cookie), row)
+
+    def record_download(self, dataset_id: int, user_id: Optional[int], cookie: str):
+        row = {
+            "user_id": user_id,
+            "dataset_id": dataset_id,
+            "download_date": datetime.now(timezone.utc),
+            "download_cookie": cookie,
+        }
+        self._record(self._downloads, (user_id, dataset_id, cookie), row)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._views) + len(self._downloads)
+
+    def _record(self, events: dict, key: tuple, row: dict):
+        with self._lock:
+            if self.write_behind:
+                self._ensure_flusher()
+            events.setdefault(key, row)
+            pending = len(self._views) + len(self._downloads)
+        if not self.write_behind:
+            self.flush()
+        elif pending >= self.max_pending:
+            self._wake.set()
+
+    def _ensure_flusher(self):
+        # Threads do not survive a fork, so every (gunicorn) worker process starts its own
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name="ds-event-buffer", daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as exc:
+                logger.exception(f"Could not flush view/download records: {exc}")
+
+    def flush(self) -> int:
+        """Writes the pending events. Returns the number of new records stored."""
+        with self._flush_lock:
+            with self._lock:
+                views, downloads = self._views, self._downloads
+                self._views, self._downloads = {}, {}
+            if not views and not downloads:
+                return 0
+
+            with self.app.app_context():
+                view_repository = DSViewRecordRepository()
+                download_repository = DSDownloadRecordRepository()
+                try:
+                    stored_views = view_repository.existing_keys(views)
+                    stored_downloads = download_repository.existing_keys(downloads)
+                    new_views = [row for key, row in views.items() if key not in stored_views]
+                    new_downloads = [row for key, row in downloads.items() if key not in stored_downloads]
+
+                    view_repository.bulk_create(new_views)
+                    download_repository.bulk_create(new_downloads)
+                    DataSetRepository().increment_download_counts(Counter(row["dataset_id"] for row in new_downloads))
+                    view_repository.session.commit()
+                except Exception as exc:
+                    view_repository.session.rollback()
+                    logger.warning(f"Could not store {len(views) + len(downloads)} view/download records: {exc}")
+                    self._requeue(views, downloads)
+                    return 0
+            return len(new_views) + len(new_downloads)
+
+    def _requeue(self, views: dict, downloads: dict):
+        with self._lock:
+            if len(self._views) + len(self._downloads) + len(views) + len(downloads) > self.max_pending * 10:
+                logger.error(f"Dropping {len(views) + len(downloads)} view/download records, the buffer is full")
+                return
+            for key, row in views.items():
+                self._views.setdefault(key, row)
+            for key, row in downloads.items():
+                self._downloads.setdefault(key, row)
+
+
+def get_event_buffer() -> DSEventBuffer:
+    return DSEventBuffer.for_app(current_app._get_current_object())
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch of a set of distinct visitors: 2**PRECISION one-byte registers (about 2.3% standard error),
+    stored zlib-compressed since the sketches of quiet days are mostly zeros. Merging keeps the maximum of each
+    register, so sketches of several days or datasets combine into the distinct count of their union.
+    """
+
+    PRECISION = 11
+    REGISTERS = 1 << PRECISION
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.REGISTERS)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data:
+            return cls()
+        return cls(zlib.decompress(data))
+
+    def to_bytes(self) -> bytes:
+        return zlib.compress(bytes(self.registers))
+
+    def add(self, value: str):
+        digest = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        index = digest >> (64 - self.PRECISION)
+        remainder = digest & ((1 << (64 - self.PRECISION)) - 1)
+        rank = (64 - self.PRECISION) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        m = self.REGISTERS
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small ranges are estimated far better by linear counting of the empty registers
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class DSStatsRollupService(BaseService):
+    """
+    Maintains the daily view/download rollups that the statistics page and the time-series endpoint read, so they
+    never count the raw record tables. `rollup` is meant to run periodically (`rosemary stats:rollup --every 300`).
+    """
+
+    MAX_TIMESERIES_DAYS = 366
+    # Record ids are allocated on insert but become visible on commit, so a write-behind flush of another worker can
+    # still commit ids below the watermark read by a run. Every run re-reads this many ids below the last watermark;
+    # day counts are recomputed from scratch and re-adding a visitor never changes a sketch, so that is harmless.
+    RESCAN_IDS = 10000
+
+    def __init__(self):
+        super().__init__(DSDailyStatsRepository())
+        self.view_repository = DSViewRecordRepository()
+        self.download_repository = DSDownloadRecordRepository()
+
+    def rollup(self, rebuild: bool = False) -> int:
+        """Folds the records added since the last run into their days and returns how many day rows changed."""
+        if rebuild:
+            self.repository.clear()
+        state = self.repository.get_state()
+        view_from = max(0, state.last_view_id - self.RESCAN_IDS)
+        download_from = max(0, state.last_download_id - self.RESCAN_IDS)
+        max_view_id = self.view_repository.max_id()
+        max_download_id = self.download_repository.max_id()
+
+        views = self.repository.touched_days(DSViewRecord, DSViewRecord.view_date, view_from, max_view_id)
+        downloads = self.repository.touched_days(
+            DSDownloadRecord, DSDownloadRecord.download_date, download_from, max_download_id
+        )
+
+        updated = 0
+        for dataset_id, days in views.items():
+            counts = self.repository.count_days(
+                DSViewRecord, DSViewRecord.view_date, dataset_id, days, distinct_column=DSViewRecord.view_cookie
+            )
+            for day in days:
+                row = self.repository.upsert(dataset_id, day)
+                total, unique = counts.get(day, (0, 0))
+                if (row.views, row.unique_views) != (total, unique):
+                    row.views, row.unique_views = total, unique
+                    updated += 1
+        for dataset_id, days in downloads.items():
+            counts = self.repository.count_days(DSDownloadRecord, DSDownloadRecord.download_date, dataset_id, days)
+            for day in days:
+                row = self.repository.upsert(dataset_id, day)
+                total = counts.get(day, (0, 0))[0]
+                if row.downloads != total:
+                    row.downloads = total
+                    updated += 1
+
+        view_keys = self.repository.visitor_keys(
+            DSViewRecord, DSViewRecord.view_date, DSViewRecord.view_cookie, view_from, max_view_id
+        )
+        self._fold_visitors(view_keys, "viewers_sketch")
+        download_keys = self.repository.visitor_keys(
+            DSDownloadRecord,
+            DSDownloadRecord.download_date,
+            DSDownloadRecord.download_cookie,
+            download_from,
+            max_download_id,
+        )
+        self._fold_visitors(download_keys, "downloaders_sketch")
+
+        state.last_view_id = max(state.last_view_id, max_view_id)
+        state.last_download_id = max(state.last_download_id, max_download_id)
+        self.repository.session.commit()
+        return updated
+
+    def _fold_visitors(self, visitor_keys, sketch_attribute):
+        """Adds the visitors of the new records to the stored sketches; re-adding a visitor never changes a sketch."""
+        sketches = {}
+        for dataset_id, day, visitor in visitor_keys:
+            sketches.setdefault((dataset_id, day), HyperLogLog()).add(visitor)
+        for (dataset_id, day), sketch in sketches.items():
+            row = self.repository.upsert(dataset_id, day)
+            stored = HyperLogLog.from_bytes(getattr(row, sketch_attribute))
+            setattr(row, sketch_attribute, stored.merge(sketch).to_bytes())
+
+    def unique_visitors(self, dataset_ids, since=None, until=None) -> dict:
+        """Estimated distinct viewers and downloaders of the datasets between two days (both included)."""
+        viewers, downloaders = HyperLogLog(), HyperLogLog()
+        for viewers_sketch, downloaders_sketch in self.repository.sketches(dataset_ids, since, until):
+            viewers.merge(HyperLogLog.from_bytes(viewers_sketch))
+            downloaders.merge(HyperLogLog.from_bytes(downloaders_sketch))
+        return {"unique_viewers": viewers.count(), "unique_downloaders": downloaders.count()}
+
+    def totals(self, dataset_id: int, since=None) -> dict:
+        return self.repository.totals(dataset_id, since)
+
+    def timeseries(self, dataset_id: int, days: int = 30) -> list:
+        """One entry per day of the window ending today, with zeros for the days without activity."""
+        days = max(1, min(days, self.MAX_TIMESERIES_DAYS))
+        end = datetime.now(timezone.utc).date()
+        start = end - timedelta(days=days - 1)
+        rows = {row.day: row for row in self.repository.between(dataset_id, start, end)}
+        series = []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            row = rows.get(day)
+            series.append(
+                row.to_dict()
+                if row
+                else {"day": day.isoformat(), "views": 0, "unique_views": 0, "downloads": 0}
+            )
+        return series
+
+
+class DSSearchIndexService(BaseService):
+    def __init__(self):
+        super().__init__(DSSearchIndexRepository())
+
+    def document_terms(self, dataset: DataSet) -> Counter:
+        metadata = dataset.ds_meta_data
+        fields = [metadata.title, metadata.description, metadata.tags]
+        for author in metadata.authors:
+            fields.extend([author.name, author.affiliation, author.orcid])
+
+        terms = Counter()
+        for field in fields:
+            terms.update(tokenize(field))
+        return terms
+
+    def index_dataset(self, dataset: DataSet):
+        self.repository.replace_document(dataset.id, self.document_terms(dataset))
+
+    def remove_dataset(self, dataset_id: int):
+        self.repository.remove_document(dataset_id)
+
+    def rebuild(self) -> int:
+        datasets = DataSet.query.all()
+        for dataset in datasets:
+            self.index_dataset(dataset)
+        return len(datasets)
+
+    def search(self, query: str) -> dict:
+        return self.repository.search(tokenize(query))
+
+
 class DOIMappingService(BaseService):
     def __init__(self):
         super().__init__(DOIMappingRepository())
@@ -236,6 +758,402 @@ class DOIMappingService(BaseService):
             return None
 
 
+class CSVPreviewService:
+    """
+    Serves the first rows of a dataset CSV from a JSON sidecar written at upload time, cached in memory by checksum,
+    so viewing a dataset does not parse its file.
+    """
+
+    PREVIEW_ROWS = 10
+    CACHE_SIZE = 256
+
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def sidecar_path(self, csv_file_path: str) -> str:
+        return f"{csv_file_path}.preview.json"
+
+    def build_preview(self, csv_file_path: str) -> dict:
+        import pandas as pd
+
+        encoding, delimiter = sniff_csv_format(csv_file_path)
+        df = pd.read_csv(csv_file_path, sep=delimiter, encoding=encoding, nrows=self.PREVIEW_ROWS)
+        return {
+            "header": [str(column) for column in df.columns],
+            "rows": df.astype(object).where(df.notna(), "").values.tolist(),
+            "delimiter": delimiter,
+            "encoding": encoding,
+        }
+
+    def write_sidecar(self, csv_file_path: str, preview: Optional[dict] = None) -> Optional[dict]:
+        """Writes the preview sidecar of a CSV. A missing sidecar is rebuilt on view, so failures are only logged."""
+        try:
+            if preview is None:
+                preview = self.build_preview(csv_file_path)
+            with open(self.sidecar_path(csv_file_path), "w", encoding="utf-8") as file:
+                json.dump(preview, file, default=str)
+            return preview
+        except Exception as exc:
+            logger.warning(f"Could not write CSV preview sidecar for {csv_file_path}: {exc}")
+            return None
+
+    def get_preview(self, dataset: DataSet) -> Optional[dict]:
+        if not dataset.csv_file_path:
+            return None
+
+        key = dataset.checksum or dataset.csv_file_path
+        with self._cache_lock:
+            preview = self._cache.get(key)
+            if preview is not None:
+                self._cache.move_to_end(key)
+                return preview
+
+        try:
+            with open(self.sidecar_path(dataset.csv_file_path), "r", encoding="utf-8") as file:
+                preview = json.load(file)
+        except (OSError, ValueError):
+            logger.info(f"No CSV preview sidecar for dataset {dataset.id}, reading the first rows of the file")
+            preview = self.build_preview(dataset.csv_file_path)
+            self.write_sidecar(dataset.csv_file_path, preview)
+
+        with self._cache_lock:
+            self._cache[key] = preview
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return preview
+
+
+class DatasetArchiveCache:
+    """
+    Content-addressed store of dataset zips. The archive of a CSV is built once per checksum, size and modification
+    time of the file and reused by every download; a changed file gets a new key, even when it was replaced on disk
+    without updating its stored checksum, and is rebuilt. Entries are evicted least-recently-used once the folder
+    grows past its byte budget.
+    """
+
+    # Builds are serialized per archive through a fixed set of locks picked by path hash, so the locks do not grow
+    # with the number of datasets; two archives sharing a stripe just build one after the other
+    BUILD_LOCK_STRIPES = 64
+    _build_locks = tuple(threading.Lock() for _ in range(BUILD_LOCK_STRIPES))
+
+    def __init__(self, folder: str, max_bytes: int):
+        self.folder = folder
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_config(cls, config) -> "DatasetArchiveCache":
+        return cls(config.get("ARCHIVE_CACHE_FOLDER", "uploads/.archives"), config.get("ARCHIVE_CACHE_MAX_BYTES", 0))
+
+    @staticmethod
+    def etag(dataset: DataSet) -> str:
+        stat = os.stat(dataset.csv_file_path)
+        compression = "stored" if ZIP_COMPRESSION == ZIP_STORED else "deflate"
+        return f"{dataset.checksum}-{stat.st_size:x}-{stat.st_mtime_ns:x}-{compression}"
+
+    def archive_path(self, dataset: DataSet) -> str:
+        return os.path.join(self.folder, f"dataset_{dataset.id}_{self.etag(dataset)}.zip")
+
+    def _lock_for(self, path: str) -> threading.Lock:
+        return self._build_locks[hash(path) % len(self._build_locks)]
+
+    def get_archive(self, dataset: DataSet) -> str:
+        """Returns the path of the cached zip of the dataset, building it first when missing or stale."""
+        path = self.archive_path(dataset)
+        if not os.path.isfile(path):
+            with self._lock_for(path):
+                if not os.path.isfile(path):
+                    self._build(dataset, path)
+        self._touch(path)
+        return path
+
+    def _build(self, dataset: DataSet, path: str):
+        os.makedirs(self.folder, exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as archive:
+                for chunk in stream_zip([(dataset.csv_file_path, os.path.basename(dataset.csv_file_path))]):
+                    archive.write(chunk)
+            if self.archive_path(dataset) != path:
+                raise OSError(f"{dataset.csv_file_path} changed while it was being archived")
+            # Readers never see a half-written archive, whichever process built it
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._remove_stale_versions(dataset, path)
+        self.evict(keep=path)
+
+    def _touch(self, path: str):
+        # The access time drives the LRU order; the modification time is left alone for the freshness check
+        stat = os.stat(path)
+        os.utime(path, (time.time(), stat.st_mtime))
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.folder) as scan:
+            for entry in scan:
+                if entry.is_file() and entry.name.endswith(".zip"):
+                    stat = entry.stat()
+                    entries.append((stat.st_atime, stat.st_size, entry.path))
+        return entries
+
+    def _remove_stale_versions(self, dataset: DataSet, path: str):
+        prefix = f"dataset_{dataset.id}_"
+        for _, _, entry_path in self._entries():
+            if entry_path != path and os.path.basename(entry_path).startswith(prefix):
+                self._remove(entry_path)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Removes the least recently used archives until the cache fits its budget. Returns the bytes freed."""
+        if not self.max_bytes:
+            return 0
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, entry_path in entries:
+            if total - freed <= self.max_bytes:
+                break
+            if entry_path != keep and self._remove(entry_path):
+                freed += size
+        return freed
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+class FileDeliveryService:
+    """
+    Sends files from the upload volumes. With USE_X_ACCEL_REDIRECT the response carries no body, only an
+    X-Accel-Redirect to the internal nginx location that maps the file's folder, so nginx streams the bytes with
+    sendfile (and answers ranges) while the worker is released right away. Validators stay in Flask: the redirect
+    carries the ETag and Last-Modified that send_file would set and revalidations are answered here with a 304, so the
+    strong ETags of downloads hold and callers can tell a revalidation from a download.
+    """
+
+    def __init__(self, config):
+        self.enabled = config.get("USE_X_ACCEL_REDIRECT", False)
+        self.locations = config.get("X_ACCEL_REDIRECT_LOCATIONS", {})
+
+    def internal_uri(self, file_path: str) -> Optional[str]:
+        real_path = os.path.realpath(file_path)
+        for prefix, folder in self.locations.items():
+            real_folder = os.path.realpath(folder)
+            if os.path.commonpath([real_path, real_folder]) == real_folder:
+                relative = os.path.relpath(real_path, real_folder).replace(os.sep, "/")
+                return prefix + quote(relative)
+        return None
+
+    def send(
+        self,
+        file_path: str,
+        mimetype: Optional[str] = None,
+        as_attachment: bool = False,
+        download_name: Optional[str] = None,
+        **kwargs,
+    ) -> Response:
+        """Same arguments as flask.send_file; falls back to it when offloading is off or the file is not mapped."""
+        uri = self.internal_uri(file_path) if self.enabled else None
+        if uri is None:
+            return send_file(
+                file_path, mimetype=mimetype, as_attachment=as_attachment, download_name=download_name, **kwargs
+            )
+
+        response = Response(mimetype=mimetype or mimetypes.guess_type(file_path)[0] or "application/octet-stream")
+        response.headers["X-Accel-Redirect"] = uri
+        if as_attachment:
+            response.headers.set(
+                "Content-Disposition", "attachment", filename=download_name or os.path.basename(file_path)
+            )
+
+        stat = os.stat(file_path)
+        etag = kwargs.get("etag", True)
+        if etag is True:
+            # Same format as nginx's own ETag
+            etag = f"{int(stat.st_mtime):x}-{stat.st_size:x}"
+        if etag:
+            response.set_etag(etag)
+        response.last_modified = kwargs.get("last_modified") or stat.st_mtime
+        if kwargs.get("max_age") is not None:
+            response.cache_control.public = True
+            response.cache_control.max_age = kwargs["max_age"]
+        if kwargs.get("conditional", True):
+            response = response.make_conditional(request)
+            if response.status_code == 304:
+                del response.headers["X-Accel-Redirect"]
+        return response
+
+
+class ColumnProfile:
+    """Statistics of one CSV column, accumulated chunk by chunk."""
+
+    def __init__(self, name):
+        self.name = name
+        self.type = None
+        self.null_count = 0
+        self.min = None
+        self.max = None
+        self.sketch = None
+
+    @staticmethod
+    def _type_of(series) -> str:
+        import pandas as pd
+
+        if pd.api.types.is_bool_dtype(series):
+            return "boolean"
+        if pd.api.types.is_integer_dtype(series):
+            return "integer"
+        if pd.api.types.is_float_dtype(series):
+            return "float"
+        return "string"
+
+    @staticmethod
+    def _to_python(value):
+        return value.item() if hasattr(value, "item") else value
+
+    @staticmethod
+    def _merge_bound(current, candidate, pick):
+        if current is None:
+            return candidate
+        try:
+            return pick(current, candidate)
+        except TypeError:
+            return pick(str(current), str(candidate))
+
+    def update(self, series):
+        import numpy as np
+        import pandas as pd
+
+        values = series.dropna()
+        self.null_count += len(series) - len(values)
+        if values.empty:
+            return
+
+        chunk_type = self._type_of(values)
+        if self.type is None or self.type == chunk_type:
+            self.type = chunk_type
+        elif {self.type, chunk_type} == {"integer", "float"}:
+            self.type = "float"
+        else:
+            self.type = "string"
+
+        if chunk_type == "string":
+            values = values.astype(str)
+        self.min = self._merge_bound(self.min, self._to_python(values.min()), min)
+        self.max = self._merge_bound(self.max, self._to_python(values.max()), max)
+
+        # K-minimum-values sketch: the K smallest distinct 64-bit hashes estimate the number of distinct values
+        hashes = np.unique(pd.util.hash_pandas_object(values, index=False).to_numpy())
+        if self.sketch is not None:
+            hashes = np.union1d(self.sketch, hashes)
+        self.sketch = hashes[: CSVProfileService.DISTINCT_SKETCH_SIZE]
+
+    def distinct_estimate(self) -> int:
+        if self.sketch is None:
+            return 0
+        k = CSVProfileService.DISTINCT_SKETCH_SIZE
+        if len(self.sketch) < k:
+            return len(self.sketch)
+        return int((k - 1) * 2**64 / (int(self.sketch[k - 1]) + 1))
+
+    def to_dict(self):
+        if self.type == "string":
+            bounds = (None if self.min is None else str(self.min), None if self.max is None else str(self.max))
+        else:
+            bounds = (self.min, self.max)
+        return {
+            "name": self.name,
+            "type": self.type or "empty",
+            "null_count": int(self.null_count),
+            "min": bounds[0],
+            "max": bounds[1],
+            "distinct_estimate": self.distinct_estimate(),
+        }
+
+
+class CSVProfileService(BaseService):
+    """
+    Profiles a CSV in a single streaming pass at ingest: the encoding and delimiter are sniffed from a prefix, then the
+    file is read in chunks with the C parser to count rows and accumulate per-column statistics. The first chunk also
+    provides the preview sidecar.
+    """
+
+    CHUNK_ROWS = 50000
+    DISTINCT_SKETCH_SIZE = 1024
+
+    def __init__(self):
+        super().__init__(DSProfileRepository())
+
+    def profile(self, csv_file_path: str) -> dict:
+        import pandas as pd
+
+        encoding, delimiter = sniff_csv_format(csv_file_path)
+        row_count = 0
+        columns = None
+        preview = None
+
+        for chunk in pd.read_csv(csv_file_path, sep=delimiter, encoding=encoding, chunksize=self.CHUNK_ROWS):
+            if columns is None:
+                columns = [ColumnProfile(str(name)) for name in chunk.columns]
+                head = chunk.head(CSVPreviewService.PREVIEW_ROWS)
+                preview = {
+                    "header": [column.name for column in columns],
+                    "rows": head.astype(object).where(head.notna(), "").values.tolist(),
+                    "delimiter": delimiter,
+                    "encoding": encoding,
+                }
+            row_count += len(chunk)
+            for column, (_, series) in zip(columns, chunk.items()):
+                column.update(series)
+
+        if columns is None:
+            # A header without rows yields no chunk
+            header = pd.read_csv(csv_file_path, sep=delimiter, encoding=encoding, nrows=0)
+            columns = [ColumnProfile(str(name)) for name in header.columns]
+            preview = {"header": [c.name for c in columns], "rows": [], "delimiter": delimiter, "encoding": encoding}
+
+        return {
+            "encoding": encoding,
+            "delimiter": delimiter,
+            "row_count": row_count,
+            "columns": [column.to_dict() for column in columns],
+            "preview": preview,
+        }
+
+    def try_profile_dataset(self, dataset: DataSet):
+        """
+        Profiles a dataset inside the caller's transaction without ever failing it: a valid CSV the profiler cannot
+        handle is logged and the dataset stored without a profile, which `rosemary dataset:backfill` can build later.
+        """
+        try:
+            with self.repository.session.begin_nested():
+                return self.profile_dataset(dataset, commit=False)
+        except Exception as exc:
+            logger.warning(f"Could not profile dataset {dataset.id}, storing it without a profile: {exc}")
+            return None
+
+    def profile_dataset(self, dataset: DataSet, commit: bool = True):
+        """Profiles the dataset CSV, stores its profile row and preview sidecar and fills row_count/column_names."""
+        result = self.profile(dataset.csv_file_path)
+        CSVPreviewService().write_sidecar(dataset.csv_file_path, result["preview"])
+
+        dataset.row_count = result["row_count"]
+        dataset.column_names = ",".join(column["name"] for column in result["columns"])
+        return self.repository.save_for_dataset(
+            dataset.id,
+            commit=commit,
+            encoding=result["encoding"],
+            delimiter=result["delimiter"],
+            row_count=result["row_count"],
+            columns=result["columns"],
+        )
+
+
 class SizeService:
 
     def __init__(self):
@@ -1,6 +1,6 @@
 import io
 
-from app.modules.dataset.models import Community
+from app.modules.dataset.models import Community, DataSet
 from app.modules.auth.models import User
 from app import db
 
@@ -23,3 +23,79 @@ def test_create_community_model(test_client):
     assert c.name == "Test Community"
     assert c.logo_path == "/tmp/fake_logo.png"
     assert c.description == "Descripción de prueba"
+
+
+def test_dataset_file_size_is_read_from_stored_column():
+    dataset = DataSet(csv_file_path="/nonexistent/beers.csv", size_bytes=2048)
+
+    assert dataset.get_file_total_size() == 2048
+    assert dataset.get_file_total_size_for_human() == "2.0 KB"
+
+
+def test_dataset_without_stored_size_reports_zero():
+    dataset = DataSet(csv_file_path="/nonexistent/beers.csv")
+
+    assert dataset.get_file_total_size() == 0
+
+
+def explain(query):
+    """Returns (index, index_only) for every table access in the plan of the query, on MariaDB/MySQL or SQLite."""
+    from sqlalchemy import text
+
+    sql = str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    if db.engine.dialect.name == "sqlite":
+        accesses = []
+        for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")):
+            detail = row[-1]
+            index = detail.split(" INDEX ")[1].split(" ")[0] if " INDEX " in detail else None
+            accesses.append((index, "COVERING INDEX" in detail))
+        return accesses
+    plan = db.session.execute(text(f"EXPLAIN {sql}")).mappings().all()
+    return [(row["key"], "Using index" in (row["Extra"] or "")) for row in plan]
+
+
+def test_view_and_download_queries_are_index_only(test_client):
+    from datetime import datetime, timedelta
+
+    from app.modules.dataset.models import DSDownloadRecord, DSMetaData, DSViewRecord, PublicationType
+    from app.modules.dataset.repositories import record_count_query, record_keys_query
+
+    user = User.query.first()
+    datasets = []
+    for i in range(3):
+        meta_data = DSMetaData(title=f"Indexed {i}", description="d", publication_type=PublicationType.NONE)
+        dataset = DataSet(user_id=user.id, ds_meta_data=meta_data)
+        db.session.add_all([meta_data, dataset])
+        datasets.append(dataset)
+    db.session.flush()
+    now = datetime.utcnow()
+    for i in range(60):
+        dataset_id = datasets[i % 3].id
+        db.session.add(DSViewRecord(dataset_id=dataset_id, view_date=now - timedelta(days=i), view_cookie=f"c{i}"))
+        db.session.add(
+            DSDownloadRecord(dataset_id=dataset_id, download_date=now - timedelta(days=i), download_cookie=f"c{i}")
+        )
+    db.session.commit()
+
+    dataset_id = datasets[0].id
+    week_ago = now - timedelta(days=7)
+    view_keys = record_keys_query(DSViewRecord, DSViewRecord.view_cookie, [dataset_id], ["c0", "c3"])
+    download_keys = record_keys_query(DSDownloadRecord, DSDownloadRecord.download_cookie, [dataset_id], ["c0", "c3"])
+    expected_plans = [
+        # Any of the composite indexes leads with dataset_id and covers a plain count
+        (record_count_query(DSViewRecord, DSViewRecord.view_date, dataset_id), "ix_ds_view_record_"),
+        (
+            record_count_query(DSViewRecord, DSViewRecord.view_date, dataset_id, since=week_ago),
+            "ix_ds_view_record_dataset_id_view_date",
+        ),
+        (
+            record_count_query(DSDownloadRecord, DSDownloadRecord.download_date, dataset_id, since=week_ago),
+            "ix_ds_download_record_dataset_id_download_date",
+        ),
+        (view_keys, "ix_ds_view_record_dataset_id_cookie_user_id"),
+        (download_keys, "ix_ds_download_record_dataset_id_cookie_user_id"),
+    ]
+    for query, index_name in expected_plans:
+        [(index, index_only)] = explain(query)
+        assert index is not None and index.startswith(index_name), str(query)
+        assert index_only, str(query)
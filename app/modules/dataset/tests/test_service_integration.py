@@ -1,3 +1,4 @@
+import hashlib
 from io import BytesIO
 import os
 from unittest.mock import patch 
@@ -125,8 +126,8 @@ def test_update_datasets_service(MockDataSetClass, test_client):
         community = service.create_from_form(form=community_form, current_user=user, logo_file=fake_file)
     ds1 = create_mock_dataset(id=10, title="Dataset Ten")
     ds3 = create_mock_dataset(id=30, title="Dataset Thirty")
-    service.repository.session.commit = MagicMock() 
-    service.update_datasets(community.id, [ds1, ds3])
+    with patch.object(service.repository.session, "commit"):
+        service.update_datasets(community.id, [ds1, ds3])
     
     history = inspect(community).attrs.datasets.history
     added_items = history.added
@@ -134,6 +135,8 @@ def test_update_datasets_service(MockDataSetClass, test_client):
     assert len(added_items) == 2
     ids = sorted([d.id for d in added_items])
     assert ids == [10, 30]
+    # The mocked datasets must not reach the next flush of the shared session
+    service.repository.session.remove()
     try:
         if community.logo_path and os.path.exists(community.logo_path):
             os.remove(community.logo_path)
@@ -264,4 +267,166 @@ def test_get_community_detail(mock_community_service, test_client):
 
         assert "Detail Test Community" in html
         assert "Dataset Associated 1" in html
-        assert "Dataset Associated 2" in html
\ No newline at end of file
+        assert "Dataset Associated 2" in html
+
+def test_backfill_file_metadata_stores_size_and_checksum(test_client, tmp_path):
+    from app.modules.dataset.models import DataSet, DSMetaData, PublicationType
+    from app.modules.dataset.services import DataSetService
+
+    csv_path = tmp_path / "beers.csv"
+    csv_path.write_text("name,abv\nmahou,5.5\n")
+
+    user = User.query.first()
+    dataset = DataSet(
+        user_id=user.id,
+        ds_meta_data=DSMetaData(title="Backfill", description="Backfill", publication_type=PublicationType.NONE),
+        csv_file_path=str(csv_path),
+    )
+    db.session.add(dataset)
+    db.session.commit()
+
+    assert DataSetService().backfill_file_metadata() >= 1
+
+    db.session.refresh(dataset)
+    assert dataset.size_bytes == csv_path.stat().st_size
+    assert dataset.checksum == hashlib.md5(csv_path.read_bytes()).hexdigest()
+    assert dataset.checksum_sha256 == hashlib.sha256(csv_path.read_bytes()).hexdigest()
+
+
+def test_offloaded_download_revalidation_is_answered_by_flask(test_app, test_client, tmp_path, monkeypatch):
+    from app.modules.dataset.models import DataSet, DSDownloadRecord, DSMetaData, PublicationType
+
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    csv_path = uploads / "beers.csv"
+    csv_path.write_bytes(b"name,abv\nweiss,5.2\n")
+    monkeypatch.setitem(test_app.config, "USE_X_ACCEL_REDIRECT", True)
+    monkeypatch.setitem(test_app.config, "X_ACCEL_REDIRECT_LOCATIONS", {"/_protected/uploads/": str(uploads)})
+
+    user = User.query.first()
+    meta_data = DSMetaData(title="Offloaded", description="d", publication_type=PublicationType.NONE)
+    dataset = DataSet(
+        user_id=user.id, ds_meta_data=meta_data, csv_file_path=str(csv_path), checksum_sha256="ab" * 32, size_bytes=19
+    )
+    db.session.add_all([meta_data, dataset])
+    db.session.commit()
+    url = f"/dataset/download/{dataset.id}?format=csv"
+
+    response = test_client.get(url)
+    assert response.status_code == 200
+    assert response.headers["X-Accel-Redirect"] == "/_protected/uploads/beers.csv"
+    assert response.headers["ETag"] == f'"{"ab" * 32}"'
+    assert "Last-Modified" in response.headers
+
+    # Fresh clients carry no download cookie, so every counted request would be a new record
+    revalidation = test_app.test_client().get(url, headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidation.status_code == 304
+    assert "X-Accel-Redirect" not in revalidation.headers
+    assert test_app.test_client().get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    assert DSDownloadRecord.query.filter_by(dataset_id=dataset.id).count() == 2
+
+
+def test_profiling_failure_does_not_abort_the_upload(test_client, tmp_path, monkeypatch):
+    from app.modules.dataset.models import DataSet, DSMetaData, DSProfile, PublicationType
+    from app.modules.dataset.services import CSVProfileService
+
+    def unreadable(self, csv_file_path):
+        raise ValueError("unsupported dialect")
+
+    monkeypatch.setattr(CSVProfileService, "profile", unreadable)
+    csv_path = tmp_path / "odd.csv"
+    csv_path.write_bytes(b"a|b\n1|2\n")
+
+    user = User.query.first()
+    meta_data = DSMetaData(title="Odd", description="d", publication_type=PublicationType.NONE)
+    dataset = DataSet(user_id=user.id, ds_meta_data=meta_data)
+    db.session.add_all([meta_data, dataset])
+    db.session.flush()
+    dataset.csv_file_path = str(csv_path)
+
+    assert CSVProfileService().try_profile_dataset(dataset) is None
+    db.session.commit()
+
+    db.session.expire_all()
+    assert db.session.get(DataSet, dataset.id).csv_file_path == str(csv_path)
+    assert DSProfile.query.filter_by(dataset_id=dataset.id).first() is None
+
+    monkeypatch.undo()
+    assert CSVProfileService().try_profile_dataset(dataset) is not None
+    db.session.commit()
+    assert DSProfile.query.filter_by(dataset_id=dataset.id).one().delimiter == "|"
+    assert dataset.row_count == 1
+
+
+def test_stats_rollup_is_incremental(test_client):
+    from datetime import datetime, timedelta
+
+    from app.modules.dataset.models import (
+        DataSet,
+        DSDailyStats,
+        DSDownloadRecord,
+        DSMetaData,
+        DSViewRecord,
+        PublicationType,
+    )
+    from app.modules.dataset.services import DSStatsRollupService
+
+    service = DSStatsRollupService()
+    service.rollup()
+
+    user = User.query.first()
+    meta_data = DSMetaData(title="Rolled up", description="d", publication_type=PublicationType.NONE)
+    dataset = DataSet(user_id=user.id, ds_meta_data=meta_data)
+    db.session.add_all([meta_data, dataset])
+    db.session.flush()
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    yesterday = today - timedelta(days=1)
+    db.session.add_all(
+        [
+            DSViewRecord(dataset_id=dataset.id, view_date=today, view_cookie="a"),
+            DSViewRecord(dataset_id=dataset.id, view_date=today, view_cookie="a"),
+            DSViewRecord(dataset_id=dataset.id, view_date=today, view_cookie="b"),
+            DSViewRecord(dataset_id=dataset.id, view_date=yesterday, view_cookie="a"),
+            DSDownloadRecord(dataset_id=dataset.id, download_date=yesterday, download_cookie="a"),
+        ]
+    )
+    db.session.commit()
+
+    assert service.rollup() == 3
+    assert service.rollup() == 0
+    assert service.totals(dataset.id) == {"views": 4, "downloads": 1}
+
+    db.session.add(DSDownloadRecord(dataset_id=dataset.id, download_date=today, download_cookie="c"))
+    db.session.commit()
+    assert service.rollup() == 1
+
+    row = db.session.get(DSDailyStats, (dataset.id, today.date()))
+    assert (row.views, row.unique_views, row.downloads) == (3, 2, 1)
+
+    series = service.timeseries(dataset.id, days=3)
+    assert [entry["views"] for entry in series] == [0, 1, 3]
+    assert [entry["downloads"] for entry in series] == [0, 1, 1]
+
+    assert service.unique_visitors([dataset.id]) == {"unique_viewers": 2, "unique_downloaders": 2}
+    assert service.unique_visitors([dataset.id], since=today.date()) == {"unique_viewers": 2, "unique_downloaders": 1}
+
+    service.rollup(rebuild=True)
+    assert db.session.get(DSDailyStats, (dataset.id, today.date())).unique_views == 2
+    assert service.totals(dataset.id, since=today.date()) == {"views": 3, "downloads": 1}
+
+    # A record that commits after a run with an id below its watermark (a slower flush of another worker) still counts
+    late = DSViewRecord(dataset_id=dataset.id, view_date=today, view_cookie="d")
+    db.session.add(late)
+    db.session.flush()
+    late_id = late.id
+    db.session.add(DSViewRecord(dataset_id=dataset.id, view_date=today, view_cookie="e"))
+    db.session.delete(late)
+    db.session.commit()
+    assert service.rollup() == 1
+
+    db.session.add(DSViewRecord(id=late_id, dataset_id=dataset.id, view_date=today, view_cookie="d"))
+    db.session.commit()
+    assert service.rollup() == 1
+    assert service.totals(dataset.id, since=today.date()) == {"views": 5, "downloads": 1}
+    assert service.unique_visitors([dataset.id], since=today.date())["unique_viewers"] == 4
@@ -0,0 +1,231 @@
+import hashlib
+import os
+from io import BytesIO
+from types import SimpleNamespace
+from zipfile import ZIP_STORED, ZipFile
+
+from werkzeug.datastructures import FileStorage
+
+from app.modules.dataset import services
+from app.modules.dataset.services import (
+    CSVPreviewService,
+    CSVProfileService,
+    DatasetArchiveCache,
+    DSEventBuffer,
+    FileDeliveryService,
+    HyperLogLog,
+    calculate_checksums_and_size,
+    hash_stream,
+    save_file_with_checksums,
+    sniff_csv_format,
+    stream_zip,
+)
+
+CSV_CONTENT = b"name,abv,ibu\n" + b"mahou,5.5,20\n" * 5000
+
+
+def test_hash_stream_reads_in_bounded_chunks(monkeypatch):
+    monkeypatch.setattr(services, "CHECKSUM_CHUNK_SIZE", 1024)
+
+    class RecordingStream(BytesIO):
+        reads = []
+
+        def read(self, size=-1):
+            self.reads.append(size)
+            return super().read(size)
+
+    md5, sha256, size = hash_stream(RecordingStream(CSV_CONTENT))
+
+    assert md5 == hashlib.md5(CSV_CONTENT).hexdigest()
+    assert sha256 == hashlib.sha256(CSV_CONTENT).hexdigest()
+    assert size == len(CSV_CONTENT)
+    assert set(RecordingStream.reads) == {1024}
+
+
+def test_save_file_with_checksums_writes_and_hashes_in_one_pass(tmp_path):
+    upload = FileStorage(stream=BytesIO(CSV_CONTENT), filename="beers.csv", content_type="text/csv")
+    upload.stream.read(10)  # the form validators leave the stream wherever they stopped reading
+    destination = tmp_path / "beers.csv"
+
+    checksums = save_file_with_checksums(upload, str(destination))
+
+    assert destination.read_bytes() == CSV_CONTENT
+    assert checksums == calculate_checksums_and_size(str(destination))
+    assert checksums[0] == hashlib.md5(CSV_CONTENT).hexdigest()
+
+
+def test_sniff_csv_format_detects_delimiter_and_encoding(tmp_path):
+    csv_path = tmp_path / "cervezas.csv"
+    csv_path.write_bytes("nombre;abv;país\nmahou;5,5;españa\n".encode("latin-1"))
+
+    assert sniff_csv_format(str(csv_path)) == ("latin-1", ";")
+
+
+def test_csv_preview_is_served_from_sidecar_and_memory(tmp_path, monkeypatch):
+    csv_path = tmp_path / "beers.csv"
+    csv_path.write_bytes(CSV_CONTENT)
+    service = CSVPreviewService()
+    sidecar = service.write_sidecar(str(csv_path))
+
+    assert sidecar["header"] == ["name", "abv", "ibu"]
+    assert len(sidecar["rows"]) == CSVPreviewService.PREVIEW_ROWS
+    assert sidecar["delimiter"] == ","
+
+    def fail_build(_):
+        raise AssertionError("the CSV must not be parsed when a sidecar exists")
+
+    monkeypatch.setattr(service, "build_preview", fail_build)
+    dataset = SimpleNamespace(id=1, csv_file_path=str(csv_path), checksum="preview-test-checksum")
+
+    assert service.get_preview(dataset) == sidecar
+    (tmp_path / "beers.csv.preview.json").unlink()
+    assert service.get_preview(dataset) == sidecar
+
+
+def test_csv_profile_accumulates_statistics_across_chunks(tmp_path, monkeypatch):
+    csv_path = tmp_path / "cervezas.csv"
+    rows = ["name;abv;brewery"]
+    for i in range(200):
+        # abv only becomes a float in the last chunk; brewery is empty every ten rows
+        abv = f"{i % 7}.5" if i >= 150 else str(i % 7)
+        brewery = "" if i % 10 == 0 else f"b{i % 3}"
+        rows.append(f"beer{i};{abv};{brewery}")
+    csv_path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    monkeypatch.setattr(CSVProfileService, "CHUNK_ROWS", 64)
+
+    profile = CSVProfileService().profile(str(csv_path))
+
+    assert (profile["encoding"], profile["delimiter"], profile["row_count"]) == ("utf-8", ";", 200)
+    name, abv, brewery = profile["columns"]
+    assert (name["type"], name["distinct_estimate"], name["min"], name["max"]) == ("string", 200, "beer0", "beer99")
+    assert (abv["type"], abv["min"], abv["max"], abv["null_count"]) == ("float", 0, 6.5, 0)
+    assert (brewery["null_count"], brewery["distinct_estimate"]) == (20, 3)
+    assert profile["preview"]["header"] == ["name", "abv", "brewery"]
+    assert len(profile["preview"]["rows"]) == CSVPreviewService.PREVIEW_ROWS
+
+
+def test_stream_zip_builds_a_valid_archive_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(services, "CHECKSUM_CHUNK_SIZE", 4096)
+    csv_path = tmp_path / "beers.csv"
+    csv_path.write_bytes(CSV_CONTENT)
+
+    for compression in (services.ZIP_DEFLATED, ZIP_STORED):
+        chunks = list(stream_zip([(str(csv_path), "beers.csv")], compression=compression))
+
+        if compression == ZIP_STORED:
+            # Stored entries are emitted as they are read; deflate may hold data back until it is flushed
+            assert len(chunks) > len(CSV_CONTENT) // 4096
+        with ZipFile(BytesIO(b"".join(chunks))) as archive:
+            assert archive.testzip() is None
+            assert archive.read("beers.csv") == CSV_CONTENT
+
+        # A later build (here of a touched file) yields the same bytes, so a cached ETag stays valid
+        os.utime(csv_path, (0, 0))
+        assert b"".join(stream_zip([(str(csv_path), "beers.csv")], compression=compression)) == b"".join(chunks)
+
+
+def test_archive_cache_reuses_rebuilds_and_evicts(tmp_path):
+    cache = DatasetArchiveCache(str(tmp_path / "archives"), max_bytes=1)
+    datasets = []
+    for dataset_id in (1, 2):
+        csv_path = tmp_path / f"beers_{dataset_id}.csv"
+        csv_path.write_bytes(CSV_CONTENT)
+        datasets.append(SimpleNamespace(id=dataset_id, csv_file_path=str(csv_path), checksum=f"checksum{dataset_id}"))
+
+    first = cache.get_archive(datasets[0])
+    built_at = os.path.getmtime(first)
+    assert cache.get_archive(datasets[0]) == first
+    assert os.path.getmtime(first) == built_at
+
+    datasets[0].checksum = "changed"
+    rebuilt = cache.get_archive(datasets[0])
+    assert rebuilt != first and not os.path.exists(first)
+
+    # A file replaced on disk behind the stored checksum gets a new archive and ETag too
+    etag = cache.etag(datasets[0])
+    replacement = b"name,abv\nstout,8.0\n"
+    with open(datasets[0].csv_file_path, "wb") as f:
+        f.write(replacement)
+    assert cache.etag(datasets[0]) != etag
+    replaced = cache.get_archive(datasets[0])
+    assert replaced != rebuilt and not os.path.exists(rebuilt)
+    with ZipFile(replaced) as archive:
+        assert archive.read("beers_1.csv") == replacement
+
+    # Over budget: building the second archive evicts the least recently used one
+    second = cache.get_archive(datasets[1])
+    assert os.listdir(cache.folder) == [os.path.basename(second)]
+    with ZipFile(second) as archive:
+        assert archive.read("beers_2.csv") == CSV_CONTENT
+
+
+def test_file_delivery_hands_mapped_files_to_nginx(tmp_path):
+    from flask import Flask
+
+    uploads = tmp_path / "uploads"
+    (uploads / "user_1").mkdir(parents=True)
+    csv_path = uploads / "user_1" / "cervezas de trigo.csv"
+    csv_path.write_bytes(CSV_CONTENT)
+    config = {"USE_X_ACCEL_REDIRECT": True, "X_ACCEL_REDIRECT_LOCATIONS": {"/_protected/uploads/": str(uploads)}}
+
+    with Flask(__name__).test_request_context():
+        response = FileDeliveryService(config).send(str(csv_path), as_attachment=True, download_name="beers.csv")
+        assert response.headers["X-Accel-Redirect"] == "/_protected/uploads/user_1/cervezas%20de%20trigo.csv"
+        assert response.get_data() == b""
+        assert "beers.csv" in response.headers["Content-Disposition"]
+
+        outside = tmp_path / "elsewhere.csv"
+        outside.write_bytes(CSV_CONTENT)
+        fallback = FileDeliveryService(config).send(str(outside))
+        fallback.direct_passthrough = False
+        assert "X-Accel-Redirect" not in fallback.headers
+        assert fallback.get_data() == CSV_CONTENT
+
+
+def test_event_buffer_dedupes_and_flushes_in_batches(monkeypatch):
+    from unittest.mock import MagicMock
+
+    from flask import Flask
+
+    view_repository, download_repository, dataset_repository = MagicMock(), MagicMock(), MagicMock()
+    view_repository.existing_keys.return_value = set()
+    download_repository.existing_keys.return_value = {(None, 2, "old-cookie")}
+    monkeypatch.setattr(services, "DSViewRecordRepository", lambda: view_repository)
+    monkeypatch.setattr(services, "DSDownloadRecordRepository", lambda: download_repository)
+    monkeypatch.setattr(services, "DataSetRepository", lambda: dataset_repository)
+
+    buffer = DSEventBuffer(Flask(__name__), write_behind=True)
+    monkeypatch.setattr(buffer, "_ensure_flusher", lambda: None)
+    for _ in range(3):
+        buffer.record_view(1, None, "cookie-a")
+        buffer.record_download(1, None, "cookie-a")
+    buffer.record_download(1, 7, "cookie-b")
+    buffer.record_download(2, None, "old-cookie")
+
+    assert buffer.pending() == 4
+    view_repository.bulk_create.assert_not_called()
+
+    assert buffer.flush() == 3
+    assert len(view_repository.bulk_create.call_args.args[0]) == 1
+    assert [row["dataset_id"] for row in download_repository.bulk_create.call_args.args[0]] == [1, 1]
+    dataset_repository.increment_download_counts.assert_called_once_with({1: 2})
+    view_repository.session.commit.assert_called_once()
+    assert buffer.pending() == 0
+
+
+def test_hyperloglog_estimates_and_merges_distinct_visitors():
+    monday, tuesday = HyperLogLog(), HyperLogLog()
+    for i in range(6000):
+        monday.add(f"cookie:{i}")
+    for i in range(3000, 9000):
+        tuesday.add(f"cookie:{i}")
+        tuesday.add(f"cookie:{i}")
+
+    assert abs(monday.count() - 6000) < 6000 * 0.05
+    assert abs(tuesday.count() - 6000) < 6000 * 0.05
+
+    stored = monday.to_bytes()
+    assert len(stored) < HyperLogLog.REGISTERS
+    week = HyperLogLog.from_bytes(stored).merge(HyperLogLog.from_bytes(tuesday.to_bytes()))
+    assert abs(week.count() - 9000) < 9000 * 0.05
+    assert HyperLogLog.from_bytes(None).count() == 0
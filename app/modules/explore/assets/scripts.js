@@ -2,6 +2,12 @@ document.addEventListener('DOMContentLoaded', () => {
     send_query();
 });
 
+const PAGE_SIZE = 20;
+
+// Cursor of the next page of the current search, and a counter used to drop responses of outdated searches
+let nextCursor = null;
+let searchSequence = 0;
+
 function send_query() {
 
     console.log("send query...")
@@ -14,125 +20,183 @@ function send_query() {
 
     filters.forEach(filter => {
         filter.addEventListener('input', () => {
-            const csrfToken = document.getElementById('csrf_token').value;
-
-            const searchCriteria = {
-                csrf_token: csrfToken,
-                query: document.querySelector('#query').value,
-                publication_type: document.querySelector('#publication_type').value,
-                community_id: document.querySelector('#community_id').value,
-                sorting: document.querySelector('[name="sorting"]:checked').value,
-            };
-
-            console.log(document.querySelector('#publication_type').value);
-
-            fetch('/explore', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(searchCriteria),
-            })
-                .then(response => response.json())
-                .then(data => {
-
-                    console.log(data);
-                    document.getElementById('results').innerHTML = '';
-
-                    // results counter
-                    const resultCount = data.length;
-                    const resultText = resultCount === 1 ? 'dataset' : 'datasets';
-                    document.getElementById('results_number').textContent = `${resultCount} ${resultText} found`;
-
-                    if (resultCount === 0) {
-                        console.log("show not found icon");
-                        document.getElementById("results_not_found").style.display = "block";
-                    } else {
-                        document.getElementById("results_not_found").style.display = "none";
-                    }
-
-
-                    data.forEach(dataset => {
-                        let card = document.createElement('div');
-                        card.className = 'col-12';
-                        card.innerHTML = `
-                            <div class="card">
-                                <div class="card-body">
-                                    <div class="d-flex align-items-center justify-content-between">
-                                        <h3><a href="${dataset.url}">${dataset.title}</a></h3>
-                                        <div>
-                                            <span class="badge bg-primary" style="cursor: pointer;" onclick="set_publication_type_as_query('${dataset.publication_type}')">${dataset.publication_type}</span>
-                                        </div>
-                                    </div>
-                                    <p class="text-secondary">${formatDate(dataset.created_at)}</p>
-
-                                    <div class="row mb-2">
-
-                                        <div class="col-md-4 col-12">
-                                            <span class=" text-secondary">
-                                                Description
-                                            </span>
-                                        </div>
-                                        <div class="col-md-8 col-12">
-                                            <p class="card-text">${dataset.description}</p>
-                                        </div>
-
-                                    </div>
-
-                                    <div class="row mb-2">
-
-                                        <div class="col-md-4 col-12">
-                                            <span class=" text-secondary">
-                                                Authors
-                                            </span>
-                                        </div>
-                                        <div class="col-md-8 col-12">
-                                            ${dataset.authors.map(author => `
-                                                <p class="p-0 m-0">${author.name}${author.affiliation ? ` (${author.affiliation})` : ''}${author.orcid ? ` (${author.orcid})` : ''}</p>
-                                            `).join('')}
-                                        </div>
-
-                                    </div>
-
-                                    <div class="row mb-2">
-
-                                        <div class="col-md-4 col-12">
-                                            <span class=" text-secondary">
-                                                Tags
-                                            </span>
-                                        </div>
-                                        <div class="col-md-8 col-12">
-                                            ${dataset.tags.map(tag => `<span class="badge bg-primary me-1" style="cursor: pointer;" onclick="set_tag_as_query('${tag}')">${tag}</span>`).join('')}
-                                        </div>
-
-                                    </div>
-
-                                    <div class="row">
-
-                                        <div class="col-md-4 col-12">
-
-                                        </div>
-                                        <div class="col-md-8 col-12">
-                                            <a href="${dataset.url}" class="btn btn-outline-primary btn-sm" id="search" style="border-radius: 5px;">
-                                                View dataset
-                                            </a>
-                                            <a href="/dataset/download/${dataset.id}" class="btn btn-outline-primary btn-sm" id="search" style="border-radius: 5px;">
-                                                Download (${dataset.total_size_in_human_format})
-                                            </a>
-                                        </div>
-
-
-                                    </div>
-
-                                </div>
-                            </div>
-                        `;
-
-                        document.getElementById('results').appendChild(card);
-                    });
-                });
+            nextCursor = null;
+            fetch_page(true);
         });
     });
+
+    document.getElementById('load_more').addEventListener('click', () => fetch_page(false));
+}
+
+function get_search_criteria() {
+    return {
+        csrf_token: document.getElementById('csrf_token').value,
+        query: document.querySelector('#query').value,
+        publication_type: document.querySelector('#publication_type').value,
+        community_id: document.querySelector('#community_id').value,
+        sorting: document.querySelector('[name="sorting"]:checked').value,
+        limit: PAGE_SIZE,
+    };
+}
+
+function fetch_page(isFirstPage) {
+    const searchCriteria = get_search_criteria();
+    if (!isFirstPage) {
+        searchCriteria.cursor = nextCursor;
+    }
+
+    const sequence = isFirstPage ? ++searchSequence : searchSequence;
+    const loadMoreButton = document.getElementById('load_more');
+    loadMoreButton.disabled = true;
+
+    fetch('/explore', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(searchCriteria),
+    })
+        .then(response => {
+            if (!response.ok) {
+                return response.json()
+                    .catch(() => ({}))
+                    .then(body => {
+                        throw new Error(body.message || `Search failed (${response.status})`);
+                    });
+            }
+            return response.json();
+        })
+        .then(data => {
+
+            if (sequence !== searchSequence) {
+                return;
+            }
+
+            console.log(data);
+            document.getElementById('results_error').style.display = 'none';
+
+            if (isFirstPage) {
+                document.getElementById('results').innerHTML = '';
+
+                // results counter
+                const resultCount = data.total;
+                const resultText = resultCount === 1 ? 'dataset' : 'datasets';
+                document.getElementById('results_number').textContent = `${resultCount} ${resultText} found`;
+
+                if (resultCount === 0) {
+                    console.log("show not found icon");
+                    document.getElementById("results_not_found").style.display = "block";
+                } else {
+                    document.getElementById("results_not_found").style.display = "none";
+                }
+            }
+
+            (data.datasets || []).forEach(dataset => {
+                document.getElementById('results').appendChild(render_dataset_card(dataset));
+            });
+
+            nextCursor = data.next_cursor || null;
+            loadMoreButton.style.display = nextCursor ? 'inline-block' : 'none';
+        })
+        .catch(error => {
+            if (sequence !== searchSequence) {
+                return;
+            }
+
+            console.error(error);
+            if (isFirstPage) {
+                // Nothing of the new search is shown, so do not leave the counter of the previous one
+                document.getElementById('results_number').textContent = '';
+                nextCursor = null;
+                loadMoreButton.style.display = 'none';
+            }
+            const errorBox = document.getElementById('results_error');
+            errorBox.textContent = `The datasets could not be loaded: ${error.message}. Please try again.`;
+            errorBox.style.display = 'block';
+        })
+        .finally(() => {
+            if (sequence === searchSequence) {
+                loadMoreButton.disabled = false;
+            }
+        });
+}
+
+function render_dataset_card(dataset) {
+    let card = document.createElement('div');
+    card.className = 'col-12';
+    card.innerHTML = `
+        <div class="card">
+            <div class="card-body">
+                <div class="d-flex align-items-center justify-content-between">
+                    <h3><a href="${dataset.url}">${dataset.title}</a></h3>
+                    <div>
+                        <span class="badge bg-primary" style="cursor: pointer;" onclick="set_publication_type_as_query('${dataset.publication_type}')">${dataset.publication_type}</span>
+                    </div>
+                </div>
+                <p class="text-secondary">${formatDate(dataset.created_at)}</p>
+
+                <div class="row mb-2">
+
+                    <div class="col-md-4 col-12">
+                        <span class=" text-secondary">
+                            Description
+                        </span>
+                    </div>
+                    <div class="col-md-8 col-12">
+                        <p class="card-text">${dataset.description}</p>
+                    </div>
+
+                </div>
+
+                <div class="row mb-2">
+
+                    <div class="col-md-4 col-12">
+                        <span class=" text-secondary">
+                            Authors
+                        </span>
+                    </div>
+                    <div class="col-md-8 col-12">
+                        ${dataset.authors.map(author => `
+                            <p class="p-0 m-0">${author.name}${author.affiliation ? ` (${author.affiliation})` : ''}${author.orcid ? ` (${author.orcid})` : ''}</p>
+                        `).join('')}
+                    </div>
+
+                </div>
+
+                <div class="row mb-2">
+
+                    <div class="col-md-4 col-12">
+                        <span class=" text-secondary">
+                            Tags
+                        </span>
+                    </div>
+                    <div class="col-md-8 col-12">
+                        ${dataset.tags.map(tag => `<span class="badge bg-primary me-1" style="cursor: pointer;" onclick="set_tag_as_query('${tag}')">${tag}</span>`).join('')}
+                    </div>
+
+                </div>
+
+                <div class="row">
+
+                    <div class="col-md-4 col-12">
+
+                    </div>
+                    <div class="col-md-8 col-12">
+                        <a href="${dataset.url}" class="btn btn-outline-primary btn-sm" id="search" style="border-radius: 5px;">
+                            View dataset
+                        </a>
+                        <a href="/dataset/download/${dataset.id}" class="btn btn-outline-primary btn-sm" id="search" style="border-radius: 5px;">
+                            Download (${dataset.total_size_in_human_format})
+                        </a>
+                    </div>
+
+
+                </div>
+
+            </div>
+        </div>
+    `;
+    return card;
 }
 
 function formatDate(dateString) {
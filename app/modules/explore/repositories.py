@@ -1,38 +1,56 @@
-import re
+import base64
+import json
+from datetime import datetime
 
-import unidecode
-from sqlalchemy import any_, or_
+from sqlalchemy import and_, any_, false, or_
 
-from app.modules.dataset.models import Author, DataSet, DSMetaData, PublicationType, Community
+from app.modules.dataset.models import DataSet, DSMetaData, PublicationType, Community
+from app.modules.dataset.repositories import DSSearchIndexRepository, tokenize, with_metadata_and_authors
 
 from core.repositories.BaseRepository import BaseRepository
 
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(position: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, key: str) -> tuple:
+    """Returns the (key value, id) position stored in a cursor, raising ValueError if it is malformed."""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if key == "created_at":
+            return datetime.fromisoformat(position[key]), int(position["id"])
+        return float(position[key]), int(position["id"])
+    except (ValueError, TypeError, KeyError, UnicodeError, AttributeError):
+        raise ValueError("Invalid cursor")
+
 
 class ExploreRepository(BaseRepository):
     def __init__(self):
         super().__init__(DataSet)
+        self.search_index_repository = DSSearchIndexRepository()
 
-    def filter(self, query="", sorting="newest", publication_type="any", tags=[], community_id=None, **kwargs):
-        # Normalize and remove unwanted characters
-        normalized_query = unidecode.unidecode(query).lower()
-        cleaned_query = re.sub(r'[,.":\'()\[\]^;!¡¿?]', "", normalized_query)
-
-        filters = []
-        for word in cleaned_query.split():
-            filters.append(DSMetaData.title.ilike(f"%{word}%"))
-            filters.append(DSMetaData.description.ilike(f"%{word}%"))
-            filters.append(Author.name.ilike(f"%{word}%"))
-            filters.append(Author.affiliation.ilike(f"%{word}%"))
-            filters.append(Author.orcid.ilike(f"%{word}%"))
-            filters.append(DSMetaData.tags.ilike(f"%{word}%"))
-
-        datasets = (
-            self.model.query.join(DataSet.ds_meta_data)
-            .join(DSMetaData.authors)
-            .filter(or_(*filters))
-            .filter(DSMetaData.dataset_doi.isnot(None))  # Exclude datasets with empty dataset_doi
+    def build_query(self, query="", publication_type="any", tags=[], community_id=None):
+        # Normalize the query the same way the search index normalizes documents
+        words = tokenize(query)
+
+        datasets = self.model.query.join(DataSet.ds_meta_data).filter(
+            DSMetaData.dataset_doi.isnot(None)  # Exclude datasets with empty dataset_doi
         )
 
+        score = None
+        if words:
+            # Joined in SQL, so ordering by relevance and limiting a page happen in the database
+            scores = self.search_index_repository.scores(words)
+            if scores is None:
+                datasets = datasets.filter(false())
+            else:
+                datasets = datasets.join(scores, scores.c.dataset_id == DataSet.id)
+                score = scores.c.score
+
         if community_id is not None and community_id != "":
             try:
                 community_id_int = int(community_id)
@@ -57,6 +75,16 @@ class ExploreRepository(BaseRepository):
         if tags:
             datasets = datasets.filter(DSMetaData.tags.ilike(any_(f"%{tag}%" for tag in tags)))
 
+        return datasets, score
+
+    def filter(self, query="", sorting="newest", publication_type="any", tags=[], community_id=None, **kwargs):
+        datasets, score = self.build_query(query, publication_type, tags, community_id)
+
+        # Order by BM25 score, breaking ties by id like filter_page so both list tied datasets in the same order
+        datasets = with_metadata_and_authors(datasets)
+        if sorting == "relevance" and score is not None:
+            return datasets.order_by(score.desc(), self.model.id.desc()).all()
+
         # Order by created_at
         if sorting == "oldest":
             datasets = datasets.order_by(self.model.created_at.asc())
@@ -64,3 +92,51 @@ class ExploreRepository(BaseRepository):
             datasets = datasets.order_by(self.model.created_at.desc())
 
         return datasets.all()
+
+    def filter_page(
+        self,
+        query="",
+        sorting="newest",
+        publication_type="any",
+        tags=[],
+        community_id=None,
+        limit=PAGE_SIZE,
+        cursor=None,
+        with_total=False,
+        **kwargs,
+    ):
+        """
+        Returns one page of results, the cursor of the next page (None on the last page) and, if requested,
+        the total number of matching datasets.
+
+        Pages are keyset-paginated on (created_at, id), or on (score, id) when sorting by relevance,
+        so fetching a page never scans the rows of the previous ones.
+
+        Relevance pagination is best effort: scores are recomputed for every page, so a dataset indexed or edited
+        between two pages can move across the cursor and be skipped or shown twice. Date orderings are stable.
+        """
+        datasets, score = self.build_query(query, publication_type, tags, community_id)
+        limit = max(1, min(int(limit or PAGE_SIZE), MAX_PAGE_SIZE))
+        total = datasets.order_by(None).count() if with_total else None
+
+        if sorting == "relevance" and score is not None:
+            key, column, descending = "score", score, True
+        else:
+            key, column, descending = "created_at", self.model.created_at, sorting != "oldest"
+
+        if cursor:
+            value, dataset_id = decode_cursor(cursor, key)
+            if descending:
+                after = or_(column < value, and_(column == value, self.model.id < dataset_id))
+            else:
+                after = or_(column > value, and_(column == value, self.model.id > dataset_id))
+            datasets = datasets.filter(after)
+        order = (column.desc(), self.model.id.desc()) if descending else (column.asc(), self.model.id.asc())
+
+        rows = with_metadata_and_authors(datasets).add_columns(column).order_by(*order).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            last, value = rows[limit - 1]
+            value = value.isoformat() if key == "created_at" else float(value)
+            next_cursor = encode_cursor({key: value, "id": last.id})
+        return [dataset for dataset, _ in rows[:limit]], next_cursor, total
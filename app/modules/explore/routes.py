@@ -20,5 +20,15 @@ def index():
 
     if request.method == "POST":
         criteria = request.get_json()
-        datasets = ExploreService().filter(**criteria)
-        return jsonify([dataset.to_dict() for dataset in datasets])
+        try:
+            page = ExploreService().filter_page(**criteria)
+        except ValueError as exc:
+            return jsonify({"message": str(exc)}), 400
+
+        return jsonify(
+            {
+                "datasets": [dataset.to_dict() for dataset in page["datasets"]],
+                "next_cursor": page["next_cursor"],
+                "total": page["total"],
+            }
+        )
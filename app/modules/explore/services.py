@@ -7,4 +7,28 @@ class ExploreService(BaseService):
         super().__init__(ExploreRepository())
 
     def filter(self, query="", sorting="newest", publication_type="any", tags=[], community_id=None,**kwargs):
-        return self.repository.filter(query, sorting, publication_type, tags, community_id=community_id, **kwargs)
\ No newline at end of file
+        return self.repository.filter(query, sorting, publication_type, tags, community_id=community_id, **kwargs)
+
+    def filter_page(
+        self,
+        query="",
+        sorting="newest",
+        publication_type="any",
+        tags=[],
+        community_id=None,
+        limit=None,
+        cursor=None,
+        **kwargs,
+    ):
+        # The total only changes with the filters, so it is only counted for the first page
+        datasets, next_cursor, total = self.repository.filter_page(
+            query,
+            sorting,
+            publication_type,
+            tags,
+            community_id=community_id,
+            limit=limit,
+            cursor=cursor,
+            with_total=not cursor,
+        )
+        return {"datasets": datasets, "next_cursor": next_cursor, "total": total}
@@ -1,9 +1,10 @@
 import unittest
+from datetime import datetime
 from unittest.mock import Mock, patch, MagicMock
 from sqlalchemy import or_
 from flask import Flask 
 from app.modules.explore.services import ExploreService
-from app.modules.explore.repositories import ExploreRepository
+from app.modules.explore.repositories import ExploreRepository, decode_cursor
 from app.modules.dataset.models import DataSet, Community 
 
 try:
@@ -49,6 +50,20 @@ class ExploreServiceUnitTest(unittest.TestCase):
             extra_arg=test_extra_arg
         )
 
+    @patch('app.modules.explore.services.ExploreRepository')
+    def test_service_filter_page_counts_only_first_page(self, MockRepo):
+
+        mock_repo_instance = MockRepo.return_value
+        mock_repo_instance.filter_page.return_value = ([], "next", 7)
+
+        page = ExploreService().filter_page(query="ipa", limit=10)
+
+        self.assertEqual(page, {"datasets": [], "next_cursor": "next", "total": 7})
+        self.assertTrue(mock_repo_instance.filter_page.call_args.kwargs["with_total"])
+
+        ExploreService().filter_page(query="ipa", limit=10, cursor="next")
+        self.assertFalse(mock_repo_instance.filter_page.call_args.kwargs["with_total"])
+
 
     def setUp(self):
         self.app_context = app.app_context()
@@ -59,14 +74,13 @@ class ExploreServiceUnitTest(unittest.TestCase):
         self.mock_model_query.join.return_value = self.mock_model_query
         self.mock_model_query.filter.return_value = self.mock_model_query
         self.mock_model_query.order_by.return_value = self.mock_model_query
+        self.mock_model_query.options.return_value = self.mock_model_query
         self.mock_model_query.all.return_value = []
         
 
         self.patcher_dataset = patch.object(DataSet, 'query', new=self.mock_model_query)
         self.patcher_dataset.start()
         
-        self.patcher_or = patch('app.modules.explore.repositories.or_', return_value=Mock(name='mock_or_clause'))
-        self.mock_or = self.patcher_or.start()
         self.mock_communities = MagicMock()
         self.mock_communities.any.return_value = Mock(name='community_filter_clause_result')
         
@@ -81,7 +95,6 @@ class ExploreServiceUnitTest(unittest.TestCase):
 
     def tearDown(self):
         self.patcher_dataset.stop()
-        self.patcher_or.stop()
         self.patcher_communities.stop()
         self.app_context.pop() 
 
@@ -105,35 +118,129 @@ class ExploreServiceUnitTest(unittest.TestCase):
         )
         
         self.assertTrue(found_filter_call, "El resultado de DataSet.communities.any() no se pasó a query.filter().")
-        self.assertEqual(self.mock_filter.call_count, 3, "Se esperaban 3 llamadas a filter (or, doi, community).")
+        self.assertEqual(self.mock_filter.call_count, 2, "Se esperaban 2 llamadas a filter (doi, community).")
         
     def test_filter_by_community_id_not_applied_for_none(self):
 
         self.repository.filter(community_id=None)
         
         self.mock_communities.any.assert_not_called()
-        self.assertEqual(self.mock_filter.call_count, 2)
+        self.assertEqual(self.mock_filter.call_count, 1)
         
     def test_filter_by_community_id_not_applied_for_empty_string(self):
 
         self.repository.filter(community_id="")
         
         self.mock_communities.any.assert_not_called()
-        self.assertEqual(self.mock_filter.call_count, 2)
+        self.assertEqual(self.mock_filter.call_count, 1)
 
     def test_filter_by_community_id_handles_invalid_int(self):
 
         self.repository.filter(community_id="abc")
         
         self.mock_communities.any.assert_not_called()
-        self.assertEqual(self.mock_filter.call_count, 2)
+        self.assertEqual(self.mock_filter.call_count, 1)
         
     def test_filter_by_community_id_handles_zero(self):
 
         self.repository.filter(community_id="0")
         
         self.mock_communities.any.assert_not_called()
-        self.assertEqual(self.mock_filter.call_count, 2)
+        self.assertEqual(self.mock_filter.call_count, 1)
+
+    def test_filter_with_query_joins_the_search_index_scores(self):
+
+        scores = MagicMock()
+        self.repository.search_index_repository = Mock()
+        self.repository.search_index_repository.scores.return_value = scores
+
+        self.repository.filter(query="Estrella, Galicia!")
+
+        self.repository.search_index_repository.scores.assert_called_once_with(["estrella", "galicia"])
+        self.assertEqual(self.mock_model_query.join.call_args[0][0], scores)
+        self.assertEqual(self.mock_filter.call_count, 1, "Los ids del índice se unen con join, no con filter.")
+
+    def test_filter_with_unmatched_query_returns_nothing(self):
+
+        self.repository.search_index_repository = Mock()
+        self.repository.search_index_repository.scores.return_value = None
+
+        self.repository.filter(query="zzz")
+
+        self.assertEqual(self.mock_filter.call_count, 2, "Se esperaban 2 llamadas a filter (doi, false).")
+
+    def test_filter_by_relevance_orders_by_search_score(self):
+
+        scores = MagicMock()
+        self.repository.search_index_repository = Mock()
+        self.repository.search_index_repository.scores.return_value = scores
+
+        self.repository.filter(query="lager", sorting="relevance")
+
+        self.assertEqual(self.mock_model_query.order_by.call_args[0][0], scores.c.score.desc.return_value)
+        self.assertTrue(self.mock_model_query.order_by.call_args[0][1].compare(DataSet.id.desc()))
+
+    def test_filter_page_returns_next_cursor_when_more_results(self):
+
+        first = Mock(id=9, created_at=datetime(2025, 1, 2))
+        second = Mock(id=8, created_at=datetime(2025, 1, 1))
+        self.mock_model_query.limit.return_value = self.mock_model_query
+        self.mock_model_query.add_columns.return_value = self.mock_model_query
+        self.mock_model_query.all.return_value = [(first, first.created_at), (second, second.created_at)]
+
+        results, next_cursor, total = self.repository.filter_page(limit=1)
+
+        self.mock_model_query.limit.assert_called_once_with(2)
+        self.assertEqual(results, [first])
+        self.assertIsNone(total)
+        self.assertEqual(decode_cursor(next_cursor, "created_at"), (datetime(2025, 1, 2), 9))
+
+    def test_filter_page_rejects_invalid_cursor(self):
+
+        with self.assertRaises(ValueError):
+            self.repository.filter_page(cursor="not-a-cursor")
+
+
+def test_search_ranks_and_paginates_in_sql(test_client):
+    from app import db
+    from app.modules.auth.models import User
+    from app.modules.dataset.models import DSMetaData, PublicationType
+    from app.modules.dataset.services import AuthorService, DSSearchIndexService
+
+    user = User.query.first()
+    index = DSSearchIndexService()
+    titles = ["Lager lager lager", "Lager and stout", "Lagerbier tasting", "Stout only", "La rubia", "Lager notes"]
+    datasets = []
+    for i, title in enumerate(titles):
+        meta_data = DSMetaData(
+            title=title, description="beer", publication_type=PublicationType.NONE, dataset_doi=f"10.1/search.{i}"
+        )
+        datasets.append(DataSet(user_id=user.id, ds_meta_data=meta_data))
+        db.session.add_all([meta_data, datasets[-1]])
+    db.session.commit()
+    for dataset in datasets:
+        index.index_dataset(dataset)
+
+    scores = index.search("lager")
+    assert set(scores) == {datasets[0].id, datasets[1].id, datasets[2].id, datasets[5].id}
+    assert max(scores, key=scores.get) == datasets[0].id
+    # Short words only match whole terms instead of every term they prefix
+    assert set(index.search("la")) == {datasets[4].id}
+
+    repository = ExploreRepository()
+    ranked = [dataset.id for dataset in repository.filter(query="lager", sorting="relevance")]
+    assert ranked == sorted(scores, key=lambda dataset_id: (-scores[dataset_id], -dataset_id))
+
+    page, cursor, total = repository.filter_page(query="lager", sorting="relevance", limit=3, with_total=True)
+    rest, last_cursor, _ = repository.filter_page(query="lager", sorting="relevance", limit=3, cursor=cursor)
+    assert total == 4 and last_cursor is None
+    assert [dataset.id for dataset in page + rest] == ranked
+
+    author = AuthorService().create(name="Brewmaster Ortiz", ds_meta_data_id=datasets[3].ds_meta_data_id)
+    assert set(index.search("ortiz")) == {datasets[3].id}
+    AuthorService().update(author.id, name="Brewmaster Vidal")
+    assert index.search("ortiz") == {} and set(index.search("vidal")) == {datasets[3].id}
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -2,9 +2,8 @@ import logging
 
 from flask import render_template
 
-from app.modules.dataset.services import DataSetService
-
 from app.modules.public import public_bp
+from app.modules.public.services import PublicIndexService
 
 logger = logging.getLogger(__name__)
 
@@ -12,21 +11,13 @@ logger = logging.getLogger(__name__)
 @public_bp.route("/")
 def index():
     logger.info("Access index")
-    dataset_service = DataSetService()
-
-    # Statistics: total datasets and feature models
-    datasets_counter = dataset_service.count_synchronized_datasets()
-
-    # Statistics: total downloads
-    total_dataset_downloads = dataset_service.total_dataset_downloads()
+    public_index_service = PublicIndexService()
 
-    # Statistics: total views
-    total_dataset_views = dataset_service.total_dataset_views()
+    # Statistics: total datasets, downloads and views, cached for PUBLIC_INDEX_CACHE_TTL seconds
+    counters = public_index_service.counters()
 
     return render_template(
         "public/index.html",
-        datasets=dataset_service.latest_synchronized(),
-        datasets_counter=datasets_counter,
-        total_dataset_downloads=total_dataset_downloads,
-        total_dataset_views=total_dataset_views,
+        latest_datasets_html=public_index_service.latest_datasets_html(),
+        **counters,
     )
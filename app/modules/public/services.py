@@ -0,0 +1,62 @@
+from flask import current_app, has_app_context, render_template
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app import db
+from app.modules.dataset.models import DataSet, DSMetaData
+from app.modules.dataset.services import DataSetService
+from core.decorators.decorators import cached, invalidate
+
+PUBLIC_INDEX_TAG = "public_index"
+
+
+def public_index_ttl():
+    return current_app.config.get("PUBLIC_INDEX_CACHE_TTL", 60)
+
+
+class PublicIndexService:
+    """
+    What the landing page shows to everyone: the hub counters and the rendered latest-datasets fragment. Both are
+    cached under PUBLIC_INDEX_TAG, which is invalidated whenever a commit creates, updates or deletes a dataset or
+    changes its metadata (uploads set the CSV path in a second commit), while the view and download counters are
+    allowed to be up to PUBLIC_INDEX_CACHE_TTL seconds old.
+    """
+
+    def __init__(self):
+        self.dataset_service = DataSetService()
+
+    @cached(ttl=public_index_ttl, tags=(PUBLIC_INDEX_TAG,))
+    def counters(self) -> dict:
+        return {
+            "datasets_counter": self.dataset_service.count_synchronized_datasets(),
+            "total_dataset_downloads": self.dataset_service.total_dataset_downloads(),
+            "total_dataset_views": self.dataset_service.total_dataset_views(),
+        }
+
+    @cached(ttl=public_index_ttl, tags=(PUBLIC_INDEX_TAG,))
+    def latest_datasets_html(self) -> Markup:
+        return Markup(
+            render_template("public/_latest_datasets.html", datasets=self.dataset_service.latest_synchronized())
+        )
+
+
+def _mark_index_changed(mapper, connection, target):
+    object_session(target).info["public_index_changed"] = True
+
+
+def _invalidate_after_commit(session):
+    if session.info.pop("public_index_changed", False) and has_app_context():
+        invalidate(PUBLIC_INDEX_TAG)
+
+
+def _forget_after_rollback(session, previous_transaction):
+    session.info.pop("public_index_changed", None)
+
+
+event.listen(DataSet, "after_insert", _mark_index_changed)
+event.listen(DataSet, "after_update", _mark_index_changed)
+event.listen(DataSet, "after_delete", _mark_index_changed)
+event.listen(DSMetaData, "after_update", _mark_index_changed)
+event.listen(db.session, "after_commit", _invalidate_after_commit)
+event.listen(db.session, "after_soft_rollback", _forget_after_rollback)
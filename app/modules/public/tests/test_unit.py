@@ -0,0 +1,219 @@
+import socketserver
+import threading
+
+import pytest
+from flask import render_template_string
+
+from app import db
+from app.modules.auth.models import User
+from app.modules.dataset.models import DataSet, DSMetaData, PublicationType
+from app.modules.public.services import PUBLIC_INDEX_TAG, PublicIndexService
+from core.cache.backends import BaseCache, FileSystemCache, MemoryCache, RedisCache, RedisConnection
+from core.decorators.decorators import cached, invalidate
+from core.managers.cache_manager import get_cache
+from core.managers.template_context_manager import reload_template_context
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    """Tiny in-memory server speaking the subset of the Redis protocol that RedisCache uses."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RedisStandInHandler)
+        self.data = {}
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+
+class RedisStandInHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].upper()
+            if command == b"GET":
+                value = data.get(args[1])
+                self.wfile.write(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+            elif command == b"SET":
+                data[args[1]] = args[2]
+                self.wfile.write(b"+OK\r\n")
+            elif command == b"DEL":
+                removed = sum(data.pop(k, None) is not None for k in args[1:])
+                self.wfile.write(b":%d\r\n" % removed)
+            elif command == b"SCAN":
+                prefix = args[3].rstrip(b"*")
+                keys = [k for k in data if k.startswith(prefix)]
+                self.wfile.write(b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys))
+                for k in keys:
+                    self.wfile.write(b"$%d\r\n%s\r\n" % (len(k), k))
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+
+@pytest.fixture
+def redis_stand_in():
+    server = RedisStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "filesystem", "redis"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCache(max_entries=100, key_prefix="test:")
+    if request.param == "filesystem":
+        return FileSystemCache(str(tmp_path), key_prefix="test:")
+    return RedisCache(request.getfixturevalue("redis_stand_in").url, key_prefix="test:")
+
+
+def test_cache_backends_store_invalidate_and_clear(cache):
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return {"datasets": len(loads)}
+
+    assert cache.get_or_set("counters", loader, tags=["public"]) == {"datasets": 1}
+    assert cache.get_or_set("counters", loader, tags=["public"]) == {"datasets": 1}
+    cache.set("other", None, tags=["other"])
+    assert cache.get("other", "missing") is None
+
+    cache.invalidate_tags("public")
+    assert cache.get_or_set("counters", loader, tags=["public"]) == {"datasets": 2}
+    assert cache.get("other", "missing") is None
+
+    cache.clear()
+    assert cache.get("counters") is None
+
+
+def test_values_loaded_during_an_invalidation_are_not_served(cache):
+    def loader():
+        cache.invalidate_tags("public")
+        return "stale"
+
+    assert cache.get_or_set("counters", loader, tags=["public"]) == "stale"
+    assert cache.get_or_set("counters", lambda: "fresh", tags=["public"]) == "fresh"
+
+
+def test_memory_cache_is_bounded_by_size_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("core.cache.backends.time.monotonic", lambda: now[0])
+    cache = MemoryCache(max_entries=2, default_ttl=60)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+    now[0] += 61
+    assert cache.get("a") is None
+    cache.set("forever", 4, ttl=0)
+    now[0] += 10**6
+    assert cache.get("forever") == 4
+
+
+def test_redis_cache_misses_when_the_server_is_down():
+    cache = RedisCache("redis://127.0.0.1:1/0", timeout=0.2)
+
+    cache.set("counters", 1)
+    assert cache.get_or_set("counters", lambda: 2) == 2
+
+
+def test_redis_cache_backs_off_after_a_failure(monkeypatch, redis_stand_in):
+    now = [100.0]
+    monkeypatch.setattr("core.cache.backends.time.monotonic", lambda: now[0])
+    cache = RedisCache("redis://127.0.0.1:1/0", timeout=0.2)
+    connects = []
+    connect = RedisConnection.connect
+    monkeypatch.setattr(RedisConnection, "connect", lambda self: connects.append(self.port) or connect(self))
+
+    assert cache.get("counters") is None
+    assert cache.get("counters") is None
+    assert len(connects) == 1
+
+    # Once the back-off is over the server is tried again
+    cache.url = redis_stand_in.url
+    cache._local.connection = None
+    cache.set("counters", 1)
+    assert cache.get("counters") is None
+    now[0] += RedisCache.RETRY_AFTER
+    cache.set("counters", 1)
+    assert cache.get("counters") == 1
+
+
+def test_cache_backends_must_implement_the_storage_methods():
+    class IncompleteCache(BaseCache):
+        def _get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteCache()
+
+
+def test_cached_decorator_keys_by_arguments_and_tags(test_app):
+    calls = []
+
+    class StatsService:
+        @cached(tags=("dataset:{dataset_id}",))
+        def summary(self, dataset_id, days=7):
+            calls.append((dataset_id, days))
+            return len(calls)
+
+    service = StatsService()
+    assert service.summary(1) == service.summary(1, days=7) == 1
+    assert service.summary(2) == 2
+
+    invalidate("dataset:1")
+    assert service.summary(1) == 3
+    assert service.summary(2) == 2
+
+
+def test_committing_a_new_dataset_invalidates_the_index(test_client):
+    get_cache().set("probe", "cached", tags=[PUBLIC_INDEX_TAG])
+
+    user = User.query.first()
+    meta_data = DSMetaData(title="Fresh", description="d", publication_type=PublicationType.NONE, tags="ale")
+    dataset = DataSet(user_id=user.id, ds_meta_data=meta_data, csv_file_path="/tmp/fresh.csv", size_bytes=10)
+    db.session.add_all([meta_data, dataset])
+    db.session.flush()
+    assert get_cache().get("probe") == "cached"
+    db.session.commit()
+
+    assert get_cache().get("probe") is None
+    assert PublicIndexService().counters()["datasets_counter"] >= 0
+    response = test_client.get("/")
+    assert response.status_code == 200
+    assert b"Fresh" in response.data
+
+
+def test_template_context_is_read_once_and_reloaded_on_demand(test_app, tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKING_DIR", f"{tmp_path}/")
+    (tmp_path / ".version").write_text("v1\n")
+    reload_template_context(test_app)
+
+    (tmp_path / ".version").write_text("v2\n")
+    with test_app.test_request_context():
+        assert render_template_string("{{ APP_VERSION }}") == "v1"
+
+    reload_template_context(test_app)
+    with test_app.test_request_context():
+        assert render_template_string("{{ APP_VERSION }} {{ APP_VERSION }}") == "v2 v2"
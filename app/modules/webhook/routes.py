@@ -5,6 +5,7 @@ from flask import abort, request
 
 from app.modules.webhook import webhook_bp
 from app.modules.webhook.services import WebhookService
+from core.managers.template_context_manager import reload_template_context
 
 load_dotenv()
 
@@ -31,6 +32,9 @@ def deploy():
     # Run migrations in the container
     service.execute_container_command(web_container, "flask db upgrade")
 
+    # Pick up the new .version in this process; the restart below refreshes the others
+    reload_template_context()
+
     # Log the deployment
     service.log_deployment(web_container)
 
@@ -3,11 +3,20 @@ from datetime import datetime, timezone
 
 from flask import abort
 
-import docker
 from app.modules.webhook.repositories import WebhookRepository
 from core.services.BaseService import BaseService
 
-client = docker.from_env()
+_client = None
+
+
+def get_docker_client():
+    """Connects to the Docker daemon on first use instead of when the module is imported."""
+    global _client
+    if _client is None:
+        import docker
+
+        _client = docker.from_env()
+    return _client
 
 
 class WebhookService(BaseService):
@@ -15,9 +24,11 @@ class WebhookService(BaseService):
         super().__init__(WebhookRepository())
 
     def get_web_container(self):
+        from docker.errors import NotFound
+
         try:
-            return client.containers.get("web_app_container")
-        except docker.errors.NotFound:
+            return get_docker_client().containers.get("web_app_container")
+        except NotFound:
             abort(404, description="Web container not found.")
 
     def get_volume_name(self, container):
@@ -1,5 +1,51 @@
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy import Enum as SQLAlchemyEnum
+
 from app import db
 
 
 class Zenodo(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+
+
+class ZenodoJobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ZenodoJob(db.Model):
+    """A queued run of the Zenodo deposition pipeline for one dataset, consumed by the `zenodo:worker` process."""
+
+    __table_args__ = (db.Index("ix_zenodo_job_status_run_after", "status", "run_after"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id", ondelete="CASCADE"), unique=True, nullable=False)
+    status = db.Column(SQLAlchemyEnum(ZenodoJobStatus), nullable=False, default=ZenodoJobStatus.PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    last_error = db.Column(db.Text)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(120))
+    locked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    dataset = db.relationship("DataSet", backref=db.backref("zenodo_job", uselist=False, passive_deletes=True))
+
+    def to_dict(self):
+        return {
+            "dataset_id": self.dataset_id,
+            "status": self.status.value,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "last_error": self.last_error,
+            "run_after": self.run_after.isoformat() if self.run_after else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f"<ZenodoJob dataset_id={self.dataset_id} status={self.status.value} attempts={self.attempts}>"
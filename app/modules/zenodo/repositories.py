@@ -1,7 +1,103 @@
-from app.modules.zenodo.models import Zenodo
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import update
+
+from app.modules.zenodo.models import Zenodo, ZenodoJob, ZenodoJobStatus
 from core.repositories.BaseRepository import BaseRepository
 
 
 class ZenodoRepository(BaseRepository):
     def __init__(self):
         super().__init__(Zenodo)
+
+
+class ZenodoJobRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(ZenodoJob)
+
+    def get_by_dataset(self, dataset_id: int) -> Optional[ZenodoJob]:
+        return self.model.query.filter_by(dataset_id=dataset_id).first()
+
+    def enqueue(self, dataset_id: int, commit: bool = True) -> ZenodoJob:
+        """Queues the dataset, resetting its job when it already ran so a failed deposition can be retried."""
+        job = self.get_by_dataset(dataset_id)
+        if job is None:
+            job = ZenodoJob(dataset_id=dataset_id)
+            self.session.add(job)
+        job.status = ZenodoJobStatus.PENDING
+        job.attempts = 0
+        job.last_error = None
+        job.run_after = datetime.utcnow()
+        job.locked_by = None
+        job.locked_at = None
+        job.finished_at = None
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
+        return job
+
+    def claim_next(self, worker_id: str) -> Optional[ZenodoJob]:
+        """
+        Marks the oldest due job as running for this worker. The claim is a conditional UPDATE on the pending status,
+        so when several workers race for the same row only one of them gets it.
+        """
+        now = datetime.utcnow()
+        while True:
+            candidate = (
+                self.session.query(ZenodoJob.id)
+                .filter(ZenodoJob.status == ZenodoJobStatus.PENDING, ZenodoJob.run_after <= now)
+                .order_by(ZenodoJob.run_after, ZenodoJob.id)
+                .first()
+            )
+            if candidate is None:
+                self.session.commit()
+                return None
+
+            claimed = (
+                self.session.query(ZenodoJob)
+                .filter(ZenodoJob.id == candidate.id, ZenodoJob.status == ZenodoJobStatus.PENDING)
+                .update(
+                    {
+                        ZenodoJob.status: ZenodoJobStatus.RUNNING,
+                        ZenodoJob.locked_by: worker_id,
+                        ZenodoJob.locked_at: now,
+                        ZenodoJob.attempts: ZenodoJob.attempts + 1,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            self.session.commit()
+            if claimed:
+                return self.get_by_id(candidate.id)
+
+    def renew_lease(self, job_id: int, worker_id: str) -> bool:
+        """
+        Moves the lock of a running job forward, only if this worker still holds it. It runs in a transaction of its
+        own, so a heartbeat never commits or waits on the caller's pending changes.
+        """
+        with self.session.get_bind().begin() as connection:
+            renewed = connection.execute(
+                update(ZenodoJob)
+                .where(
+                    ZenodoJob.id == job_id,
+                    ZenodoJob.status == ZenodoJobStatus.RUNNING,
+                    ZenodoJob.locked_by == worker_id,
+                )
+                .values(locked_at=datetime.utcnow())
+            )
+        return renewed.rowcount == 1
+
+    def release_stale(self, locked_before: datetime) -> int:
+        """Puts back in the queue the running jobs whose worker stopped renewing their lease."""
+        released = (
+            self.session.query(ZenodoJob)
+            .filter(ZenodoJob.status == ZenodoJobStatus.RUNNING, ZenodoJob.locked_at < locked_before)
+            .update(
+                {ZenodoJob.status: ZenodoJobStatus.PENDING, ZenodoJob.locked_by: None, ZenodoJob.locked_at: None},
+                synchronize_session=False,
+            )
+        )
+        self.session.commit()
+        return released
@@ -1,4 +1,5 @@
-from flask import render_template
+from flask import abort, jsonify, render_template
+from flask_login import login_required
 
 from app.modules.zenodo import zenodo_bp
 from app.modules.zenodo.services import ZenodoService
@@ -13,3 +14,13 @@ def index():
 def zenodo_test() -> dict:
     service = ZenodoService()
     return service.test_full_connection()
+
+
+@zenodo_bp.route("/zenodo/metrics", methods=["GET"])
+@login_required
+def zenodo_metrics():
+    from app.modules.admin.routes import is_admin
+
+    if not is_admin():
+        abort(403)
+    return jsonify(ZenodoService.get_client_metrics())
@@ -1,12 +1,21 @@
 import logging
 import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
 
 import requests
 from dotenv import load_dotenv
-from flask import Response, jsonify
+from flask import Response, current_app, has_app_context, jsonify
+from requests.adapters import HTTPAdapter
 
 from app.modules.dataset.models import DataSet
-from app.modules.zenodo.repositories import ZenodoRepository
+from app.modules.zenodo.models import ZenodoJob, ZenodoJobStatus
+from app.modules.zenodo.repositories import ZenodoJobRepository, ZenodoRepository
 from core.services.BaseService import BaseService
 
 logger = logging.getLogger(__name__)
@@ -14,8 +23,202 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 
+class ZenodoUnavailableError(Exception):
+    """Raised without calling Zenodo while the circuit breaker is open."""
+
+
+class ZenodoLeaseLostError(Exception):
+    """Raised when the job a worker is running was requeued or claimed by another worker."""
+
+
+class JobLease:
+    """
+    Keeps a running job claimed by one worker. `renew` moves the job's lock forward at most every third of the lease
+    (or always with `force`) and raises ZenodoLeaseLostError once the worker no longer holds the job.
+    """
+
+    def __init__(self, repository, job_id: int, worker_id: str, seconds: float):
+        self.repository = repository
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.seconds = seconds
+        self.renewed_at = time.monotonic()
+
+    def renew(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.renewed_at < self.seconds / 3:
+            return
+        if not self.repository.renew_lease(self.job_id, self.worker_id):
+            raise ZenodoLeaseLostError(f"Zenodo job {self.job_id} is no longer held by worker {self.worker_id}")
+        self.renewed_at = now
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls and rejects calls for `reset_timeout` seconds. After that a
+    single trial call is let through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Ends a call that failed for reasons unrelated to Zenodo, letting the next call be the half-open trial."""
+        with self._lock:
+            self._trial_running = False
+
+
+class ZenodoClientMetrics:
+    """Process-wide counters of the calls made to Zenodo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.failures = 0
+            self.retries = 0
+            self.rejected = 0
+            self.total_latency = 0.0
+            self.max_latency = 0.0
+
+    def record(self, latency: float, failed: bool):
+        with self._lock:
+            self.requests += 1
+            self.failures += int(failed)
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "retries": self.retries,
+                "rejected": self.rejected,
+                "avg_latency_ms": round(self.total_latency / self.requests * 1000, 1) if self.requests else 0.0,
+                "max_latency_ms": round(self.max_latency * 1000, 1),
+            }
+
+
+_session = None
+_session_lock = threading.Lock()
+circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("ZENODO_BREAKER_THRESHOLD", 5)),
+    reset_timeout=float(os.getenv("ZENODO_BREAKER_RESET_SECONDS", 30)),
+)
+client_metrics = ZenodoClientMetrics()
+
+
+def get_http_session() -> requests.Session:
+    """Returns the keep-alive session shared by every ZenodoService of the process, so connections are reused."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = int(os.getenv("ZENODO_POOL_SIZE", 10))
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+class UploadStream:
+    """
+    Read-only view of a file for streamed request bodies. It exposes its length, so the request is sent with a
+    Content-Length without buffering the file, yields `chunk_size` blocks and reports the bytes sent so far.
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = 1024 * 1024, progress=None):
+        self.file = open(file_path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.sent = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        # Iterated rather than read() so the HTTP layer sends chunk_size blocks instead of its own small ones
+        while True:
+            chunk = self.file.read(self.chunk_size)
+            if not chunk:
+                return
+            self.sent += len(chunk)
+            if self.progress:
+                self.progress(self.sent, self.size)
+            yield chunk
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET):
+        self.sent = self.file.seek(offset, whence)
+        return self.sent
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 class ZenodoService(BaseService):
 
+    CONNECT_TIMEOUT = float(os.getenv("ZENODO_CONNECT_TIMEOUT", 5))
+    READ_TIMEOUT = float(os.getenv("ZENODO_READ_TIMEOUT", 60))
+    UPLOAD_READ_TIMEOUT = float(os.getenv("ZENODO_UPLOAD_READ_TIMEOUT", 600))
+    MAX_RETRIES = int(os.getenv("ZENODO_MAX_RETRIES", 3))
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 30.0
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+
     def get_zenodo_url(self):
 
         FLASK_ENV = os.getenv("FLASK_ENV", "development")
@@ -40,6 +243,70 @@ class ZenodoService(BaseService):
         self.headers = {"Content-Type": "application/json"}
         self.params = {"access_token": self.ZENODO_ACCESS_TOKEN}
 
+    def _backoff(self, attempt: int, response=None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.BACKOFF_MAX)
+        # Full jitter keeps the workers retrying at the same time from hitting Zenodo in lockstep
+        return random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2**attempt))
+
+    def _request(self, method: str, url: str, read_timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        Sends a request through the shared session with connect/read timeouts. 429 and 5xx responses, timeouts and
+        connection errors are retried with exponential backoff; non-idempotent requests (POST) are only retried when
+        Zenodo certainly did not process them (429 or a failed connection). Calls fail fast with
+        ZenodoUnavailableError while the circuit breaker is open.
+        """
+        method = method.upper()
+        idempotent = method in self.IDEMPOTENT_METHODS
+        kwargs.setdefault("timeout", (self.CONNECT_TIMEOUT, read_timeout or self.READ_TIMEOUT))
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            if not circuit_breaker.allow():
+                client_metrics.increment("rejected")
+                raise ZenodoUnavailableError("Zenodo is unavailable, try again later")
+
+            started = time.monotonic()
+            response = None
+            try:
+                response = get_http_session().request(method, url, **kwargs)
+            except requests.RequestException as exc:
+                client_metrics.record(time.monotonic() - started, failed=True)
+                circuit_breaker.record_failure()
+                transient = isinstance(exc, (requests.ConnectionError, requests.Timeout))
+                retryable = transient and (idempotent or isinstance(exc, requests.ConnectTimeout))
+                if not retryable or attempt == self.MAX_RETRIES:
+                    raise
+                logger.warning(f"Zenodo {method} {url} failed ({exc}), retrying...")
+            except BaseException:
+                # E.g. reading the upload stream failed: no verdict on Zenodo, but the trial must not stay running
+                circuit_breaker.release()
+                raise
+            else:
+                failed = response.status_code >= 500
+                client_metrics.record(time.monotonic() - started, failed=failed)
+                if failed:
+                    circuit_breaker.record_failure()
+                else:
+                    circuit_breaker.record_success()
+
+                retryable = response.status_code == 429 or (failed and idempotent)
+                if response.status_code not in self.RETRY_STATUSES or not retryable or attempt == self.MAX_RETRIES:
+                    return response
+                logger.warning(f"Zenodo {method} {url} returned {response.status_code}, retrying...")
+
+            client_metrics.increment("retries")
+            time.sleep(self._backoff(attempt, response))
+            # The failed attempt consumed the upload stream
+            for file in (kwargs.get("files") or {}).values():
+                file.seek(0)
+            if hasattr(kwargs.get("data"), "seek"):
+                kwargs["data"].seek(0)
+
+    @staticmethod
+    def get_client_metrics() -> dict:
+        return {**client_metrics.to_dict(), "circuit": circuit_breaker.state}
+
     def test_connection(self) -> bool:
         """
         Test the connection with Zenodo.
@@ -47,7 +314,7 @@ class ZenodoService(BaseService):
         Returns:
             bool: True if the connection is successful, False otherwise.
         """
-        response = requests.get(self.ZENODO_API_URL, params=self.params, headers=self.headers)
+        response = self._request("GET", self.ZENODO_API_URL, params=self.params, headers=self.headers)
         return response.status_code == 200
 
     def test_full_connection(self) -> Response:
@@ -79,7 +346,7 @@ class ZenodoService(BaseService):
             }
         }
 
-        response = requests.post(self.ZENODO_API_URL, json=data, params=self.params, headers=self.headers)
+        response = self._request("POST", self.ZENODO_API_URL, json=data, params=self.params, headers=self.headers)
 
         if response.status_code != 201:
             return jsonify(
@@ -95,7 +362,7 @@ class ZenodoService(BaseService):
         data = {"name": "test_file.txt"}
         files = {"file": open(file_path, "rb")}
         publish_url = f"{self.ZENODO_API_URL}/{deposition_id}/files"
-        response = requests.post(publish_url, params=self.params, data=data, files=files)
+        response = self._request("POST", publish_url, params=self.params, data=data, files=files)
         files["file"].close()  # Close the file after uploading
 
         logger.info(f"Publish URL: {publish_url}")
@@ -110,7 +377,7 @@ class ZenodoService(BaseService):
             success = False
 
         # Step 3: Delete the deposition
-        response = requests.delete(f"{self.ZENODO_API_URL}/{deposition_id}", params=self.params)
+        response = self._request("DELETE", f"{self.ZENODO_API_URL}/{deposition_id}", params=self.params)
 
         if os.path.exists(file_path):
             os.remove(file_path)
@@ -125,7 +392,7 @@ class ZenodoService(BaseService):
         Returns:
             dict: The response in JSON format with the depositions.
         """
-        response = requests.get(self.ZENODO_API_URL, params=self.params, headers=self.headers)
+        response = self._request("GET", self.ZENODO_API_URL, params=self.params, headers=self.headers)
         if response.status_code != 200:
             raise Exception("Failed to get depositions")
         return response.json()
@@ -180,7 +447,7 @@ class ZenodoService(BaseService):
 
         data = {"metadata": metadata}
 
-        response = requests.post(self.ZENODO_API_URL, params=self.params, json=data, headers=self.headers)
+        response = self._request("POST", self.ZENODO_API_URL, params=self.params, json=data, headers=self.headers)
         if response.status_code != 201:
             error_message = f"Failed to create deposition. Error details: {response.json()}"
             raise Exception(error_message)
@@ -212,7 +479,9 @@ class ZenodoService(BaseService):
         publish_url = f"{self.ZENODO_API_URL}/{deposition_id}/files"
         
         try:
-            response = requests.post(publish_url, params=self.params, data=data, files=files)
+            response = self._request(
+                "POST", publish_url, read_timeout=self.UPLOAD_READ_TIMEOUT, params=self.params, data=data, files=files
+            )
             
             if response.status_code != 201:
                 error_message = f"Fallo al subir archivos a Zenodo. Detalles: {response.json()}"
@@ -223,6 +492,54 @@ class ZenodoService(BaseService):
         finally:
             files["file"].close()
 
+    def upload_file_to_bucket(
+        self, bucket_url: str, file_path: str, filename: str, checksum: Optional[str] = None, progress=None
+    ) -> dict:
+        """
+        Stream a file to the bucket of a deposition with a PUT, reading it from disk in chunks so memory use does not
+        depend on the file size. When the bucket already holds the file with the same MD5 (an upload that finished
+        before the job was interrupted) nothing is sent again.
+
+        Args:
+        bucket_url (str): The `links.bucket` URL of the deposition.
+        file_path (str): The full path to the file on disk.
+        filename (str): The name the file will have in Zenodo.
+        checksum (str): The MD5 of the file, used to detect a previous complete upload.
+        progress (callable): Called with (bytes_sent, total_bytes) after every chunk.
+
+        Returns:
+        dict: The response in JSON format with the details of the uploaded file.
+        """
+        if checksum:
+            response = self._request("GET", bucket_url, params=self.params)
+            if response.status_code == 200:
+                for existing in response.json().get("contents", []):
+                    if existing.get("key") == filename and existing.get("checksum") == f"md5:{checksum}":
+                        logger.info(f"{filename} is already in {bucket_url}, skipping upload")
+                        return existing
+
+        if not os.path.exists(file_path):
+            error_message = f"Fallo al subir a Zenodo: El archivo no se encontró en {file_path}"
+            logger.error(error_message)
+            raise Exception(error_message)
+
+        with UploadStream(file_path, progress=progress) as stream:
+            response = self._request(
+                "PUT",
+                f"{bucket_url}/{filename}",
+                read_timeout=self.UPLOAD_READ_TIMEOUT,
+                params=self.params,
+                data=stream,
+                headers={"Content-Type": "application/octet-stream", "Content-Length": str(stream.size)},
+            )
+
+        if response.status_code not in (200, 201):
+            raise Exception(f"Fallo al subir archivos a Zenodo. Detalles: {response.text}")
+        uploaded = response.json()
+        if checksum and uploaded.get("checksum") not in (None, f"md5:{checksum}"):
+            raise Exception(f"Checksum mismatch after uploading {filename} to Zenodo")
+        return uploaded
+
     def publish_deposition(self, deposition_id: int) -> dict:
         """
         Publish a deposition in Zenodo.
@@ -234,7 +551,7 @@ class ZenodoService(BaseService):
             dict: The response in JSON format with the details of the published deposition.
         """
         publish_url = f"{self.ZENODO_API_URL}/{deposition_id}/actions/publish"
-        response = requests.post(publish_url, params=self.params, headers=self.headers)
+        response = self._request("POST", publish_url, params=self.params, headers=self.headers)
         if response.status_code != 202:
             raise Exception("Failed to publish deposition")
         return response.json()
@@ -250,7 +567,7 @@ class ZenodoService(BaseService):
             dict: The response in JSON format with the details of the deposition.
         """
         deposition_url = f"{self.ZENODO_API_URL}/{deposition_id}"
-        response = requests.get(deposition_url, params=self.params, headers=self.headers)
+        response = self._request("GET", deposition_url, params=self.params, headers=self.headers)
         if response.status_code != 200:
             raise Exception("Failed to get deposition")
         return response.json()
@@ -266,3 +583,175 @@ class ZenodoService(BaseService):
             str: The DOI of the deposition.
         """
         return self.get_deposition(deposition_id).get("doi")
+
+
+class ZenodoJobService(BaseService):
+    """
+    Runs the Zenodo deposition pipeline out of the HTTP request. Uploads only enqueue a job; the
+    `rosemary zenodo:worker` process claims due jobs, publishes the dataset and retries failures with exponential
+    backoff.
+
+    A claimed job is a lease of ZENODO_JOB_LEASE_SECONDS that the worker renews while it uploads and checks before
+    publishing, so a job is only taken over once its worker has stopped, and a worker that lost it never publishes.
+    """
+
+    RETRY_BASE_SECONDS = 30
+    LEASE_SECONDS = 300
+
+    def __init__(self):
+        super().__init__(ZenodoJobRepository())
+        self.zenodo_service = ZenodoService()
+
+    def enqueue(self, dataset: DataSet, commit: bool = True) -> ZenodoJob:
+        return self.repository.enqueue(dataset.id, commit=commit)
+
+    def get_by_dataset(self, dataset_id: int) -> Optional[ZenodoJob]:
+        return self.repository.get_by_dataset(dataset_id)
+
+    def lease_seconds(self) -> float:
+        if has_app_context():
+            return current_app.config.get("ZENODO_JOB_LEASE_SECONDS", self.LEASE_SECONDS)
+        return self.LEASE_SECONDS
+
+    def publish_dataset(self, dataset: DataSet, lease: Optional[JobLease] = None) -> str:
+        """
+        Creates the deposition, uploads the CSV, publishes it and stores the DOI. A retried job resumes from the
+        deposition stored in the metadata instead of creating a second one. The lease of the job, if any, is renewed
+        during the upload and checked right before publishing.
+
+        Returns:
+            str: The DOI of the published deposition.
+        """
+        from app.modules.dataset.services import DataSetService
+
+        dataset_service = DataSetService()
+        ds_meta_data = dataset.ds_meta_data
+
+        deposition_id = ds_meta_data.deposition_id
+        if deposition_id is None:
+            deposition = self.zenodo_service.create_new_deposition(dataset)
+            deposition_id = deposition.get("id")
+            if not deposition_id:
+                raise Exception(f"Zenodo deposition creation failed: {deposition}")
+            dataset_service.update_dsmetadata(ds_meta_data.id, deposition_id=deposition_id)
+        else:
+            deposition = self.zenodo_service.get_deposition(deposition_id)
+
+        if not deposition.get("submitted"):
+            filename = os.path.basename(dataset.csv_file_path)
+            bucket_url = deposition.get("links", {}).get("bucket")
+            if bucket_url:
+                logger.info(f"Streaming {dataset.csv_file_path} to Zenodo bucket (Deposition ID: {deposition_id})...")
+                self.zenodo_service.upload_file_to_bucket(
+                    bucket_url,
+                    dataset.csv_file_path,
+                    filename,
+                    checksum=dataset.checksum,
+                    progress=self._upload_progress_logger(dataset, lease=lease),
+                )
+            elif not deposition.get("files"):
+                logger.info(f"Uploading {dataset.csv_file_path} to Zenodo (Deposition ID: {deposition_id})...")
+                self.zenodo_service.upload_file(dataset, deposition_id, dataset.csv_file_path, filename)
+            if lease:
+                lease.renew(force=True)
+            self.zenodo_service.publish_deposition(deposition_id)
+
+        deposition_doi = self.zenodo_service.get_doi(deposition_id)
+        if not deposition_doi:
+            raise Exception(f"DOI not found after publishing deposition {deposition_id}")
+        dataset_service.update_dsmetadata(ds_meta_data.id, dataset_doi=deposition_doi)
+        logger.info(f"Dataset {dataset.id} published on Zenodo with DOI {deposition_doi}")
+        return deposition_doi
+
+    @staticmethod
+    def _upload_progress_logger(dataset: DataSet, step: int = 10, lease: Optional[JobLease] = None):
+        """Logs the upload of the dataset every `step` percent, renewing the job lease as the bytes go out."""
+        last_logged = [-step]
+
+        def progress(sent, total):
+            if lease:
+                lease.renew()
+            percent = 100 * sent // total if total else 100
+            if percent - last_logged[0] >= step:
+                last_logged[0] = percent
+                logger.info(f"Dataset {dataset.id}: {sent}/{total} bytes uploaded to Zenodo ({percent}%)")
+
+        return progress
+
+    def process_next(self, worker_id: str) -> Optional[ZenodoJob]:
+        """Claims and runs one due job. Returns the job, or None when the queue has nothing due."""
+        job = self.repository.claim_next(worker_id)
+        if job is None:
+            return None
+
+        logger.info(f"Worker {worker_id} running Zenodo job for dataset {job.dataset_id} (attempt {job.attempts})")
+        lease = JobLease(self.repository, job.id, worker_id, self.lease_seconds())
+        try:
+            self.publish_dataset(job.dataset, lease)
+            lease.renew(force=True)
+        except ZenodoLeaseLostError as exc:
+            # Another worker runs the job now and records its outcome
+            self.repository.session.rollback()
+            logger.warning(f"Abandoning Zenodo job for dataset {job.dataset_id}: {exc}")
+            return job
+        except Exception as exc:
+            self.repository.session.rollback()
+            logger.exception(f"Zenodo job for dataset {job.dataset_id} failed: {exc}")
+            job.last_error = str(exc)
+            if job.attempts >= job.max_attempts:
+                job.status = ZenodoJobStatus.FAILED
+                job.finished_at = datetime.utcnow()
+                self._assign_simulated_doi(job.dataset)
+            else:
+                job.status = ZenodoJobStatus.PENDING
+                job.run_after = datetime.utcnow() + timedelta(
+                    seconds=self.RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+                )
+        else:
+            job.status = ZenodoJobStatus.DONE
+            job.last_error = None
+            job.finished_at = datetime.utcnow()
+
+        job.locked_by = None
+        job.locked_at = None
+        self.repository.session.commit()
+        return job
+
+    def _assign_simulated_doi(self, dataset: DataSet):
+        # Keeps the dataset reachable through /doi/ when Zenodo is not available (e.g. sandbox tokens returning 403)
+        if dataset.ds_meta_data.dataset_doi:
+            return
+        temp_id = str(uuid.uuid4()).split("-")[0]
+        dataset.ds_meta_data.dataset_doi = f"10.9999/test-doi.{dataset.id}.{temp_id}"
+        logger.warning(f"ZENODO FAILED. Using SIMULATED DOI: {dataset.ds_meta_data.dataset_doi}")
+
+    def run_worker(
+        self, worker_id: Optional[str] = None, poll_interval: float = 5.0, once: bool = False, max_jobs: int = 0
+    ) -> int:
+        """
+        Processes jobs until interrupted, sleeping `poll_interval` seconds whenever the queue is empty. With `once` it
+        drains the due jobs and returns; `max_jobs` stops after that many jobs.
+
+        Returns:
+            int: The number of processed jobs.
+        """
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        processed = 0
+        self.release_stale()
+
+        while not max_jobs or processed < max_jobs:
+            job = self.process_next(worker_id)
+            if job is not None:
+                processed += 1
+                continue
+            if once:
+                break
+            time.sleep(poll_interval)
+            self.release_stale()
+        return processed
+
+    def release_stale(self) -> int:
+        released = self.repository.release_stale(datetime.utcnow() - timedelta(seconds=self.lease_seconds()))
+        if released:
+            logger.warning(f"Requeued {released} Zenodo jobs whose worker stopped renewing their lease")
+        return released
@@ -0,0 +1,200 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.modules.zenodo.models import ZenodoJobStatus
+from app.modules.zenodo.services import ZenodoJobService
+
+
+@pytest.fixture
+def job_service():
+    service = ZenodoJobService()
+    service.repository = MagicMock()
+    return service
+
+
+def make_job(attempts, max_attempts=3):
+    dataset = SimpleNamespace(id=1, ds_meta_data=SimpleNamespace(dataset_doi=None))
+    return SimpleNamespace(
+        id=1,
+        dataset_id=1,
+        dataset=dataset,
+        status=ZenodoJobStatus.RUNNING,
+        attempts=attempts,
+        max_attempts=max_attempts,
+        last_error=None,
+        run_after=None,
+        finished_at=None,
+        locked_by="worker",
+        locked_at=datetime.utcnow(),
+    )
+
+
+def test_failed_job_is_requeued_with_exponential_backoff(job_service, monkeypatch):
+    job = make_job(attempts=2)
+    job_service.repository.claim_next.return_value = job
+    monkeypatch.setattr(job_service, "publish_dataset", MagicMock(side_effect=Exception("Zenodo is down")))
+
+    before = datetime.utcnow()
+    assert job_service.process_next("worker") is job
+
+    assert job.status == ZenodoJobStatus.PENDING
+    assert job.last_error == "Zenodo is down"
+    assert (job.run_after - before).total_seconds() >= 2 * ZenodoJobService.RETRY_BASE_SECONDS
+    assert job.locked_by is None
+    assert job.dataset.ds_meta_data.dataset_doi is None
+
+
+def test_job_fails_for_good_after_max_attempts(job_service, monkeypatch):
+    job = make_job(attempts=3)
+    job_service.repository.claim_next.return_value = job
+    monkeypatch.setattr(job_service, "publish_dataset", MagicMock(side_effect=Exception("403")))
+
+    job_service.process_next("worker")
+
+    assert job.status == ZenodoJobStatus.FAILED
+    assert job.finished_at is not None
+    assert job.dataset.ds_meta_data.dataset_doi.startswith("10.9999/test-doi.1.")
+
+
+def test_worker_drains_due_jobs_once(job_service, monkeypatch):
+    job_service.repository.release_stale.return_value = 0
+    jobs = [make_job(attempts=1), make_job(attempts=1), None]
+    job_service.repository.claim_next.side_effect = jobs
+    monkeypatch.setattr(job_service, "publish_dataset", MagicMock(return_value="10.5281/zenodo.1"))
+
+    assert job_service.run_worker(worker_id="worker", once=True) == 2
+    assert all(job.status == ZenodoJobStatus.DONE for job in jobs[:2])
+
+
+def test_worker_that_lost_the_lease_leaves_the_job_untouched(job_service, monkeypatch):
+    job = make_job(attempts=1)
+    job_service.repository.claim_next.return_value = job
+    job_service.repository.renew_lease.return_value = False
+    publish_deposition = MagicMock()
+    job_service.zenodo_service = MagicMock(publish_deposition=publish_deposition)
+    job.dataset.ds_meta_data.deposition_id = 7
+    job.dataset.csv_file_path = "/tmp/beers.csv"
+    job_service.zenodo_service.get_deposition.return_value = {"files": [{"filename": "beers.csv"}]}
+
+    assert job_service.process_next("worker") is job
+
+    publish_deposition.assert_not_called()
+    job_service.repository.session.rollback.assert_called_once()
+    job_service.repository.session.commit.assert_not_called()
+    assert job.status == ZenodoJobStatus.RUNNING
+    assert job.locked_by == "worker"
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def zenodo_client(monkeypatch):
+    from app.modules.zenodo import services
+
+    breaker = services.CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    monkeypatch.setattr(services, "circuit_breaker", breaker)
+    monkeypatch.setattr(services, "client_metrics", services.ZenodoClientMetrics())
+    monkeypatch.setattr(services.time, "sleep", lambda seconds: None)
+    session = MagicMock()
+    monkeypatch.setattr(services, "get_http_session", lambda: session)
+    return services.ZenodoService(), session, breaker
+
+
+def test_request_retries_idempotent_calls_on_5xx_with_timeouts(zenodo_client):
+    service, session, _ = zenodo_client
+    session.request.side_effect = [FakeResponse(503), FakeResponse(200)]
+
+    assert service._request("GET", "https://zenodo.test/api").status_code == 200
+
+    assert session.request.call_count == 2
+    assert session.request.call_args.kwargs["timeout"] == (service.CONNECT_TIMEOUT, service.READ_TIMEOUT)
+    assert service.get_client_metrics()["retries"] == 1
+
+
+def test_request_does_not_retry_post_on_5xx(zenodo_client):
+    service, session, _ = zenodo_client
+    session.request.return_value = FakeResponse(502)
+
+    assert service._request("POST", "https://zenodo.test/api").status_code == 502
+    assert session.request.call_count == 1
+
+
+def test_circuit_breaker_fails_fast_while_zenodo_is_down(zenodo_client):
+    from app.modules.zenodo.services import ZenodoUnavailableError
+
+    service, session, breaker = zenodo_client
+    session.request.return_value = FakeResponse(500)
+    service._request("POST", "https://zenodo.test/api")
+    service._request("POST", "https://zenodo.test/api")
+
+    assert breaker.state == "open"
+    with pytest.raises(ZenodoUnavailableError):
+        service._request("GET", "https://zenodo.test/api")
+    assert session.request.call_count == 2
+    assert service.get_client_metrics()["rejected"] == 1
+
+
+def test_half_open_trial_is_released_when_it_raises_a_non_requests_error(zenodo_client):
+    from app.modules.zenodo import services
+
+    service, session, breaker = zenodo_client
+    breaker.opened_at = services.time.monotonic() - breaker.reset_timeout
+    session.request.side_effect = [OSError("upload stream closed"), FakeResponse(200)]
+
+    with pytest.raises(OSError):
+        service._request("PUT", "https://zenodo.test/bucket/beers.csv")
+
+    assert breaker.state == "half-open"
+    assert service._request("GET", "https://zenodo.test/api").status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_bucket_upload_streams_the_file_in_chunks(zenodo_client, tmp_path):
+    from app.modules.zenodo.services import UploadStream
+
+    service, session, _ = zenodo_client
+    csv_path = tmp_path / "beers.csv"
+    csv_path.write_bytes(b"name,abv\n" * 1000)
+    sent_chunks = []
+
+    def put(method, url, **kwargs):
+        stream = kwargs["data"]
+        assert isinstance(stream, UploadStream) and len(stream) == 9000
+        sent_chunks.extend(len(chunk) for chunk in stream)
+        response = FakeResponse(201)
+        response.json = lambda: {"key": "beers.csv"}
+        return response
+
+    session.request.side_effect = put
+    progress = []
+    service.upload_file_to_bucket(
+        "https://zenodo.test/bucket",
+        str(csv_path),
+        "beers.csv",
+        progress=lambda sent, total: progress.append((sent, total)),
+    )
+
+    assert session.request.call_args.args[:2] == ("PUT", "https://zenodo.test/bucket/beers.csv")
+    assert sent_chunks == [9000]
+    assert progress == [(9000, 9000)]
+
+
+def test_bucket_upload_is_skipped_when_zenodo_already_has_the_file(zenodo_client, tmp_path):
+    service, session, _ = zenodo_client
+    listing = FakeResponse(200)
+    listing.json = lambda: {"contents": [{"key": "beers.csv", "checksum": "md5:abc"}]}
+    session.request.return_value = listing
+
+    uploaded = service.upload_file_to_bucket(
+        "https://zenodo.test/bucket", str(tmp_path / "beers.csv"), "beers.csv", checksum="abc"
+    )
+
+    assert uploaded["checksum"] == "md5:abc"
+    assert session.request.call_count == 1
@@ -0,0 +1,374 @@
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable, Optional
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class BaseCache(ABC):
+    """
+    Common behaviour of the cache backends. Subclasses only store and expire opaque entries; tags are implemented
+    here on top of them: every tag has a random version, an entry remembers the versions of its tags when it was
+    written, and invalidating a tag gives it a new version so that all the entries written before become misses.
+    """
+
+    TAG_PREFIX = "tag:"
+
+    def __init__(self, default_ttl: int = 300, key_prefix: str = ""):
+        self.default_ttl = default_ttl
+        self.key_prefix = key_prefix
+
+    @abstractmethod
+    def _get(self, key: str):
+        """Returns the stored entry or None when it is missing or expired."""
+
+    @abstractmethod
+    def _set(self, key: str, value, ttl: Optional[float]):
+        """Stores an entry for `ttl` seconds, or with no expiry when `ttl` is None."""
+
+    @abstractmethod
+    def _delete(self, key: str):
+        """Removes an entry, if present."""
+
+    @abstractmethod
+    def clear(self):
+        """Removes every entry of this cache."""
+
+    def _ttl(self, ttl: Optional[float]) -> Optional[float]:
+        """None means the default TTL and 0 an entry that never expires."""
+        ttl = self.default_ttl if ttl is None else ttl
+        return ttl or None
+
+    def _tag_versions(self, tags: Iterable[str], create: bool = False) -> Optional[dict]:
+        versions = {}
+        for tag in tags:
+            version = self._get(self.key_prefix + self.TAG_PREFIX + tag)
+            if version is None:
+                if not create:
+                    return None
+                version = uuid.uuid4().hex
+                self._set(self.key_prefix + self.TAG_PREFIX + tag, version, None)
+            versions[tag] = version
+        return versions
+
+    def get(self, key: str, default=None):
+        entry = self._get(self.key_prefix + key)
+        if entry is None:
+            return default
+        versions, value = entry
+        if versions and self._tag_versions(versions) != versions:
+            return default
+        return value
+
+    def set(self, key: str, value, ttl: Optional[float] = None, tags: Iterable[str] = (), versions=None):
+        if versions is None:
+            versions = self._tag_versions(tags, create=True)
+        self._set(self.key_prefix + key, (versions, value), self._ttl(ttl))
+
+    def delete(self, key: str):
+        self._delete(self.key_prefix + key)
+
+    def invalidate_tags(self, *tags: str):
+        for tag in tags:
+            self._set(self.key_prefix + self.TAG_PREFIX + tag, uuid.uuid4().hex, None)
+
+    def get_or_set(self, key: str, loader, ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        # Versions are read before loading, so a value computed while one of its tags is invalidated is never served
+        versions = self._tag_versions(tags, create=True)
+        value = loader()
+        self.set(key, value, ttl, versions=versions)
+        return value
+
+
+class NullCache(BaseCache):
+    """Stores nothing, so every lookup runs the loader. Used by the tests and to switch caching off."""
+
+    def _get(self, key):
+        return None
+
+    def _set(self, key, value, ttl):
+        pass
+
+    def _delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def _tag_versions(self, tags, create=False):
+        return {} if create else None
+
+
+class MemoryCache(BaseCache):
+    """In-process LRU cache bounded by entry count and TTL. Each gunicorn worker keeps its own copy."""
+
+    def __init__(self, max_entries: int = 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value, ttl):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileSystemCache(BaseCache):
+    """
+    One pickled file per entry in a directory shared by all the workers of a host. Writes are atomic renames and the
+    oldest files are pruned once the directory holds more than `max_entries`.
+    """
+
+    SUFFIX = ".cache"
+    PRUNE_EVERY = 64
+
+    def __init__(self, directory: str, max_entries: int = 4096, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + self.SUFFIX)
+
+    def _get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                expires_at, value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError):
+            logger.warning(f"Discarding unreadable cache file {path}")
+            self._remove(path)
+            return None
+        if expires_at is not None and expires_at <= time.time():
+            self._remove(path)
+            return None
+        return value
+
+    def _set(self, key, value, ttl):
+        expires_at = time.time() + ttl if ttl else None
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def _delete(self, key):
+        self._remove(self._path(key))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _files(self):
+        return glob.glob(os.path.join(self.directory, "*" + self.SUFFIX))
+
+    def prune(self):
+        files = []
+        for path in self._files():
+            try:
+                files.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+        for _, path in sorted(files)[: max(0, len(files) - self.max_entries)]:
+            self._remove(path)
+
+    def clear(self):
+        for path in self._files():
+            self._remove(path)
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisConnection:
+    """Minimal RESP2 client, enough for the commands the cache needs, so no Redis library is required."""
+
+    def __init__(self, url: str, timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._socket = None
+        self._file = None
+
+    def connect(self):
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._socket.makefile("rb")
+        if self.password:
+            self.execute("AUTH", self.password)
+        if self.db:
+            self.execute("SELECT", self.db)
+
+    def close(self):
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+        self._socket = self._file = None
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    def execute(self, *args):
+        if self._socket is None:
+            self.connect()
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = self._encode(arg)
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        try:
+            self._socket.sendall(b"".join(parts))
+            return self._read_reply()
+        except OSError:
+            self.close()
+            raise
+
+    def _read_reply(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply {line!r}")
+
+
+class RedisCache(BaseCache):
+    """
+    Cache shared by every worker and host through a Redis-protocol server. An unreachable server is logged and
+    treated as a miss, so the application keeps working without its cache. After a failure the server is not tried
+    again for RETRY_AFTER seconds, so requests do not each pay a connection timeout while it is down.
+    """
+
+    RETRY_AFTER = 5.0
+
+    def __init__(self, url: str = "redis://localhost:6379/0", timeout: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+        self._unavailable_until = 0.0
+
+    def _connection(self) -> RedisConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = RedisConnection(self.url, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _execute(self, *args):
+        if time.monotonic() < self._unavailable_until:
+            return None
+        try:
+            return self._connection().execute(*args)
+        except (OSError, RedisError) as e:
+            self._unavailable_until = time.monotonic() + self.RETRY_AFTER
+            logger.warning(f"Cache server unavailable ({e}), continuing without cache for {self.RETRY_AFTER:g}s")
+            return None
+
+    def _get(self, key):
+        data = self._execute("GET", key)
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except (pickle.UnpicklingError, EOFError, ValueError):
+            return None
+
+    def _set(self, key, value, ttl):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if ttl:
+            self._execute("SET", key, data, "PX", int(ttl * 1000))
+        else:
+            self._execute("SET", key, data)
+
+    def _delete(self, key):
+        self._execute("DEL", key)
+
+    def clear(self):
+        """Deletes the keys under this cache's prefix only, leaving the rest of the database alone."""
+        cursor = "0"
+        while True:
+            reply = self._execute("SCAN", cursor, "MATCH", self.key_prefix + "*", "COUNT", 500)
+            if not reply:
+                return
+            cursor, keys = reply[0].decode(), reply[1]
+            if keys:
+                self._execute("DEL", *keys)
+            if cursor == "0":
+                return
@@ -9,13 +9,20 @@ def uploads_folder_name():
     return os.getenv("UPLOADS_DIR", "uploads")
 
 
-def get_app_version():
-    version_file_path = os.path.join(os.getenv("WORKING_DIR", ""), ".version")
-    try:
-        with open(version_file_path, "r") as file:
-            return file.readline().strip()
-    except FileNotFoundError:
-        return "unknown"
+_app_version = None
+
+
+def get_app_version(reload=False):
+    """Reads the .version file once per process; pass reload=True after a deploy has rewritten it."""
+    global _app_version
+    if _app_version is None or reload:
+        version_file_path = os.path.join(os.getenv("WORKING_DIR", ""), ".version")
+        try:
+            with open(version_file_path, "r") as file:
+                _app_version = file.readline().strip()
+        except FileNotFoundError:
+            _app_version = "unknown"
+    return _app_version
 
 
 def is_develop():
@@ -0,0 +1,56 @@
+"""
+Gunicorn settings for the production containers, loaded with `gunicorn -c python:core.configuration.gunicorn_config`.
+
+The values come from the GUNICORN_* attributes of the config class that ConfigManager selects for FLASK_ENV, so the
+server profile is tuned through the same environment variables as the rest of the application.
+"""
+
+import gc
+import os
+
+from dotenv import load_dotenv
+
+from core.managers.config_manager import ConfigManager
+
+load_dotenv()
+
+config = ConfigManager.config_class(os.getenv("FLASK_ENV", "production"))
+
+if config.GUNICORN_WORKER_CLASS == "gevent":
+    # Must run before the application imports socket, ssl or threading
+    from gevent import monkey
+
+    monkey.patch_all()
+
+bind = config.GUNICORN_BIND
+workers = config.GUNICORN_WORKERS
+worker_class = config.GUNICORN_WORKER_CLASS
+threads = config.GUNICORN_THREADS
+worker_connections = config.GUNICORN_WORKER_CONNECTIONS
+preload_app = config.GUNICORN_PRELOAD_APP
+max_requests = config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = config.GUNICORN_MAX_REQUESTS_JITTER
+timeout = config.GUNICORN_TIMEOUT
+graceful_timeout = config.GUNICORN_GRACEFUL_TIMEOUT
+keepalive = config.GUNICORN_KEEPALIVE
+loglevel = config.GUNICORN_LOG_LEVEL
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    # Move the objects created while preloading the app to the permanent generation, so the collector in the workers
+    # does not touch (and copy) the memory pages they share with the master
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Serving with {workers} {worker_class} workers, recycled every {max_requests} requests")
+
+
+def post_fork(server, worker):
+    # Connections opened by the master while preloading must not be shared with the workers: drop them from the
+    # inherited pools without closing the sockets, which still belong to the master
+    from app import app, db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,110 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """Counters of an InstrumentedQueuePool, kept for the life of the process (they survive Engine.dispose())."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.connect_seconds = 0.0
+
+    def record_checkout(self, seconds: float, connect_seconds: float, timed_out: bool = False):
+        # Opening a new connection is not time spent waiting for the pool
+        wait = max(0.0, seconds - connect_seconds)
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if wait >= 0.001:
+                self.waits += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+    def record_connect(self, seconds: float):
+        with self._lock:
+            self.connects += 1
+            self.connect_seconds += seconds
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "wait_seconds_avg": round(self.wait_seconds / attempts, 6) if attempts else 0.0,
+                "wait_seconds_max": round(self.max_wait_seconds, 6),
+                "connect_seconds_total": round(self.connect_seconds, 6),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout. `waits` counts the checkouts that had to queue for a connection (the pool
+    and its overflow were all in use), `timeouts` those that gave up after `pool_timeout` and `connects` the new DBAPI
+    connections, which grow after idle disconnects or recycling.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        self._local = threading.local()
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = time.perf_counter() - started
+            self._local.connect_seconds = getattr(self._local, "connect_seconds", 0.0) + elapsed
+            self.stats.record_connect(elapsed)
+
+    def _do_get(self):
+        self._local.connect_seconds = 0.0
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_checkout(time.perf_counter() - started, 0.0, timed_out=True)
+            raise
+        self.stats.record_checkout(time.perf_counter() - started, self._local.connect_seconds)
+        return record
+
+
+def pool_statistics(engine) -> dict:
+    """Current state of an engine's pool plus, for an InstrumentedQueuePool, its checkout counters."""
+    pool = engine.pool
+    statistics = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        statistics.update(
+            {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+                "timeout": pool.timeout(),
+            }
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        statistics.update(stats.to_dict())
+    return statistics
@@ -1,6 +1,10 @@
+import hashlib
+import inspect
 from functools import wraps
 
-from flask import abort
+from flask import abort, has_app_context
+
+from core.managers.cache_manager import get_cache
 
 
 def pass_or_abort(condition):
@@ -16,3 +20,48 @@ def pass_or_abort(condition):
         return decorated_function
 
     return decorator
+
+
+def cached(ttl=None, tags=(), key=None):
+    """
+    Caches the result of a function or service method in the application cache, keyed by its arguments (`self`
+    excluded). `ttl` may be a number of seconds or a callable returning one, None meaning CACHE_DEFAULT_TTL. `tags`
+    are format strings filled with the arguments, e.g. "dataset:{dataset_id}", so `invalidate("dataset:3")` drops
+    every result computed for that dataset. `key` replaces the argument-based key with a format string of its own.
+    """
+
+    def decorator(f):
+        signature = inspect.signature(f)
+        name = f"{f.__module__}.{f.__qualname__}"
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not has_app_context():
+                return f(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {k: v for k, v in bound.arguments.items() if k not in ("self", "cls")}
+            if key is not None:
+                cache_key = f"{name}:{key.format(**arguments)}"
+            else:
+                digest = hashlib.sha1(repr(sorted(arguments.items())).encode()).hexdigest()
+                cache_key = f"{name}:{digest}"
+
+            return get_cache().get_or_set(
+                cache_key,
+                lambda: f(*args, **kwargs),
+                ttl=ttl() if callable(ttl) else ttl,
+                tags=[tag.format(**arguments) for tag in tags],
+            )
+
+        decorated_function.uncached = f
+        return decorated_function
+
+    return decorator
+
+
+def invalidate(*tags):
+    """Drops every cached result carrying any of the tags."""
+    if has_app_context():
+        get_cache().invalidate_tags(*tags)
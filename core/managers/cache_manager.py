@@ -0,0 +1,34 @@
+from flask import current_app
+
+from core.cache.backends import FileSystemCache, MemoryCache, NullCache, RedisCache
+
+
+class CacheManager:
+    def __init__(self, app):
+        self.app = app
+
+    def init_cache(self):
+        config = self.app.config
+        backend = config.get("CACHE_BACKEND", "memory").lower()
+        options = {
+            "default_ttl": config.get("CACHE_DEFAULT_TTL", 300),
+            "key_prefix": config.get("CACHE_KEY_PREFIX", ""),
+        }
+
+        if backend == "memory":
+            cache = MemoryCache(max_entries=config.get("CACHE_MAX_ENTRIES", 1024), **options)
+        elif backend == "filesystem":
+            cache = FileSystemCache(config["CACHE_DIR"], max_entries=config.get("CACHE_MAX_ENTRIES", 1024), **options)
+        elif backend == "redis":
+            cache = RedisCache(config["CACHE_REDIS_URL"], **options)
+        elif backend == "null":
+            cache = NullCache(**options)
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND '{backend}', expected memory, filesystem, redis or null")
+
+        self.app.extensions["cache"] = cache
+        return cache
+
+
+def get_cache():
+    return current_app.extensions["cache"]
@@ -7,15 +7,19 @@ class ConfigManager:
         self.app = app
 
     def load_config(self, config_name="development"):
+        self.app.config.from_object(self.config_class(config_name))
+
+    @staticmethod
+    def config_class(config_name=None):
         if config_name is None:
             config_name = os.getenv("FLASK_ENV", "development")
 
         if config_name == "testing":
-            self.app.config.from_object(TestingConfig)
+            return TestingConfig
         elif config_name == "production":
-            self.app.config.from_object(ProductionConfig)
+            return ProductionConfig
         else:
-            self.app.config.from_object(DevelopmentConfig)
+            return DevelopmentConfig
 
 
 class Config:
@@ -28,9 +32,68 @@ class Config:
         f"{os.getenv('MARIADB_DATABASE', 'default_db')}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool of every worker: keep POOL_SIZE connections plus up to MAX_OVERFLOW extra ones under load, wait
+    # at most POOL_TIMEOUT seconds for a free one, and replace them before MariaDB's wait_timeout closes them on its
+    # side (POOL_RECYCLE) or if they fail a ping on checkout (POOL_PRE_PING). Size it so that
+    # GUNICORN_WORKERS x (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays under the server's max_connections.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() in ["true", "t", "1"]
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
     TIMEZONE = "Europe/Madrid"
     TEMPLATES_AUTO_RELOAD = True
     UPLOAD_FOLDER = "uploads"
+    # Pre-built dataset zips, keyed by the CSV checksum and evicted least-recently-used beyond the byte budget
+    ARCHIVE_CACHE_FOLDER = os.getenv("ARCHIVE_CACHE_FOLDER", os.path.join(UPLOAD_FOLDER, ".archives"))
+    ARCHIVE_CACHE_MAX_BYTES = int(os.getenv("ARCHIVE_CACHE_MAX_BYTES", 2 * 1024**3))
+    # Let nginx send the bytes of downloads and logos: Flask answers with an X-Accel-Redirect to an internal location
+    USE_X_ACCEL_REDIRECT = os.getenv("USE_X_ACCEL_REDIRECT", "False").lower() in ["true", "t", "1"]
+    X_ACCEL_REDIRECT_LOCATIONS = {
+        "/_protected/uploads/": UPLOAD_FOLDER,
+        "/_protected/community_logos/": os.path.join(
+            os.getenv("WORKING_DIR", os.path.join(os.getcwd(), "tmp_uploads")), "community_logos"
+        ),
+    }
+    # View/download records are buffered in memory and written in batches every TRACKING_FLUSH_INTERVAL seconds
+    TRACKING_WRITE_BEHIND = True
+    TRACKING_FLUSH_INTERVAL = float(os.getenv("TRACKING_FLUSH_INTERVAL", 5))
+    TRACKING_BUFFER_MAX = int(os.getenv("TRACKING_BUFFER_MAX", 1000))
+    # Application cache used by @cached: memory (per process), filesystem (shared by the workers of a host) or redis
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", 300))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+    CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(UPLOAD_FOLDER, ".cache"))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "cervezahub:")
+    # Authenticated users are loaded with their role and profile and kept per process for this many seconds
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+    # Landing page counters and latest-datasets fragment, cleared on dataset changes and expired after this many seconds
+    PUBLIC_INDEX_CACHE_TTL = float(os.getenv("PUBLIC_INDEX_CACHE_TTL", 60))
+    # A Zenodo worker renews the lock of its running job while uploading; a lock older than this is requeued
+    ZENODO_JOB_LEASE_SECONDS = float(os.getenv("ZENODO_JOB_LEASE_SECONDS", 300))
+    # Gunicorn server profile read by core/configuration/gunicorn_config.py: the app is imported once in the master and
+    # forked, workers default to 2 x cores + 1 and are recycled after MAX_REQUESTS (plus jitter) requests. The worker
+    # class is gthread or gevent, which needs the gevent package installed in the image.
+    GUNICORN_BIND = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+    GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+    GUNICORN_WORKER_CLASS = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+    GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", 4))
+    GUNICORN_WORKER_CONNECTIONS = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 100))
+    GUNICORN_PRELOAD_APP = os.getenv("GUNICORN_PRELOAD_APP", "True").lower() in ["true", "t", "1"]
+    GUNICORN_MAX_REQUESTS = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+    GUNICORN_MAX_REQUESTS_JITTER = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 200))
+    GUNICORN_TIMEOUT = int(os.getenv("GUNICORN_TIMEOUT", 120))
+    GUNICORN_GRACEFUL_TIMEOUT = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+    GUNICORN_KEEPALIVE = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+    GUNICORN_LOG_LEVEL = os.getenv("GUNICORN_LOG_LEVEL", "info")
     
     MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.googlemail.com")
     MAIL_PORT = int(os.getenv("MAIL_PORT", 587))
@@ -58,6 +121,7 @@ class TestingConfig(Config):
         f"{os.getenv('MARIADB_TEST_DATABASE', 'default_db')}"
     )
     WTF_CSRF_ENABLED = False
+    TRACKING_WRITE_BEHIND = False
 
 
 class ProductionConfig(Config):
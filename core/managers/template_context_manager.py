@@ -0,0 +1,50 @@
+import os
+
+from flask import current_app, has_request_context, request
+
+from core.configuration.configuration import get_app_version
+
+
+class TemplateContextManager:
+    """
+    Computes the variables injected into every template once, at startup, instead of on each render. `reload` reads
+    them again (the deploy webhook calls it after updating the code), and within a request the context is built once
+    and shared by every template rendered, see `get_request_context`.
+    """
+
+    EXTENSION = "template_context"
+
+    def __init__(self, app):
+        self.app = app
+
+    def load(self):
+        self.app.extensions[self.EXTENSION] = {
+            "FLASK_APP_NAME": os.getenv("FLASK_APP_NAME"),
+            "FLASK_ENV": os.getenv("FLASK_ENV"),
+            "DOMAIN": os.getenv("DOMAIN", "localhost"),
+            "APP_VERSION": get_app_version(reload=True),
+        }
+        return self.app.extensions[self.EXTENSION]
+
+    def register_context_processor(self):
+        self.load()
+
+        @self.app.context_processor
+        def inject_vars_into_jinja():
+            return get_request_context()
+
+
+def get_request_context():
+    """
+    Template variables of the current request, copied from the startup values on first use and then reused. They
+    are kept in the WSGI environ rather than in `g`, which outlives the request when an app context is already pushed.
+    """
+    if not has_request_context():
+        return dict(current_app.extensions[TemplateContextManager.EXTENSION])
+    if "app.template_context" not in request.environ:
+        request.environ["app.template_context"] = dict(current_app.extensions[TemplateContextManager.EXTENSION])
+    return request.environ["app.template_context"]
+
+
+def reload_template_context(app=None):
+    return TemplateContextManager(app or current_app._get_current_object()).load()
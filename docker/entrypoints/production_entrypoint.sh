@@ -54,6 +54,6 @@ else
     flask db upgrade
 fi
 
-# Start the application using Gunicorn, binding it to port 5000
-# Set the logging level to info and the timeout to 3600 seconds
-exec gunicorn --bind 0.0.0.0:5000 app:app --log-level info --timeout 3600
+# Start the application using Gunicorn with the production profile (core/configuration/gunicorn_config.py)
+# Bind address, workers, worker class, recycling and timeouts are set through the GUNICORN_* variables
+exec gunicorn -c python:core.configuration.gunicorn_config app:app
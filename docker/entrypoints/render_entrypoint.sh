@@ -51,6 +51,6 @@ else
     flask db upgrade
 fi
 
-# Start the application using Gunicorn, binding it to port 80
-# Set the logging level to info and the timeout to 3600 seconds
-exec gunicorn --bind 0.0.0.0:80 app:app --log-level info --timeout 3600
+# Start the application using Gunicorn with the production profile, binding it to port 80
+# Workers, worker class, recycling and timeouts are set through the GUNICORN_* variables
+exec gunicorn -c python:core.configuration.gunicorn_config --bind 0.0.0.0:80 app:app
@@ -0,0 +1,47 @@
+"""004
+
+Revision ID: 004
+Revises: 36fefc317ad0
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '36fefc317ad0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ds_search_document',
+    sa.Column('dataset_id', sa.Integer(), nullable=False),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['dataset_id'], ['data_set.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('dataset_id')
+    )
+    op.create_table('ds_search_term',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dataset_id', sa.Integer(), nullable=False),
+    sa.Column('term', sa.String(length=64), nullable=False),
+    sa.Column('frequency', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['dataset_id'], ['data_set.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ds_search_term', schema=None) as batch_op:
+        batch_op.create_index('ix_ds_search_term_term_dataset_id', ['term', 'dataset_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ds_search_term_dataset_id'), ['dataset_id'], unique=False)
+
+    # Existing datasets are indexed with `rosemary search:reindex`
+
+
+def downgrade():
+    with op.batch_alter_table('ds_search_term', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ds_search_term_dataset_id'))
+        batch_op.drop_index('ix_ds_search_term_term_dataset_id')
+
+    op.drop_table('ds_search_term')
+    op.drop_table('ds_search_document')
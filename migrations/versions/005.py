@@ -0,0 +1,25 @@
+"""005
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('data_set', schema=None) as batch_op:
+        batch_op.create_index('ix_data_set_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('data_set', schema=None) as batch_op:
+        batch_op.drop_index('ix_data_set_created_at_id')
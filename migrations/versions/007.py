@@ -0,0 +1,28 @@
+"""007
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('data_set', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checksum', sa.String(length=32), nullable=True))
+
+    # Existing files are measured with `rosemary dataset:backfill`
+
+
+def downgrade():
+    with op.batch_alter_table('data_set', schema=None) as batch_op:
+        batch_op.drop_column('checksum')
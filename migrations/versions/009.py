@@ -0,0 +1,36 @@
+"""009
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ds_profile',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('encoding', sa.String(length=20), nullable=False),
+        sa.Column('delimiter', sa.String(length=4), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('columns', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['dataset_id'], ['data_set.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('dataset_id')
+    )
+
+
+def downgrade():
+    op.drop_table('ds_profile')
@@ -0,0 +1,43 @@
+"""011
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ds_view_record', schema=None) as batch_op:
+        batch_op.create_index('ix_ds_view_record_dataset_id_view_date', ['dataset_id', 'view_date'], unique=False)
+        batch_op.create_index(
+            'ix_ds_view_record_dataset_id_cookie_user_id', ['dataset_id', 'view_cookie', 'user_id'], unique=False
+        )
+
+    with op.batch_alter_table('ds_download_record', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_ds_download_record_dataset_id_download_date', ['dataset_id', 'download_date'], unique=False
+        )
+        batch_op.create_index(
+            'ix_ds_download_record_dataset_id_cookie_user_id',
+            ['dataset_id', 'download_cookie', 'user_id'],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('ds_download_record', schema=None) as batch_op:
+        batch_op.drop_index('ix_ds_download_record_dataset_id_cookie_user_id')
+        batch_op.drop_index('ix_ds_download_record_dataset_id_download_date')
+
+    with op.batch_alter_table('ds_view_record', schema=None) as batch_op:
+        batch_op.drop_index('ix_ds_view_record_dataset_id_cookie_user_id')
+        batch_op.drop_index('ix_ds_view_record_dataset_id_view_date')
@@ -0,0 +1,42 @@
+"""012
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ds_daily_stats',
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('views', sa.Integer(), nullable=False),
+        sa.Column('unique_views', sa.Integer(), nullable=False),
+        sa.Column('downloads', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['dataset_id'], ['data_set.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('dataset_id', 'day')
+    )
+    op.create_table(
+        'ds_stats_rollup_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('last_view_id', sa.Integer(), nullable=False),
+        sa.Column('last_download_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('ds_stats_rollup_state')
+    op.drop_table('ds_daily_stats')
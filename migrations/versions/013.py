@@ -0,0 +1,28 @@
+"""013
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ds_daily_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('viewers_sketch', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('downloaders_sketch', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('ds_daily_stats', schema=None) as batch_op:
+        batch_op.drop_column('downloaders_sketch')
+        batch_op.drop_column('viewers_sketch')
@@ -0,0 +1,25 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("dataset:backfill", help="Stores the size, checksum and profile of dataset CSV files missing them.")
+@click.option("--force", is_flag=True, help="Recompute the size, checksum and profile of every dataset.")
+@with_appcontext
+def dataset_backfill(force):
+    from app.modules.dataset.services import DataSetService
+
+    click.echo(click.style("Computing dataset file sizes and checksums...", fg="yellow"))
+    try:
+        updated = DataSetService().backfill_file_metadata(force=force)
+    except Exception as e:
+        click.echo(click.style(f"Error backfilling dataset files: {e}", fg="red"))
+        return
+    click.echo(click.style(f"Size and checksum stored for {updated} datasets.", fg="green"))
+
+    click.echo(click.style("Profiling dataset CSV files...", fg="yellow"))
+    try:
+        profiled = DataSetService().backfill_profiles(force=force)
+    except Exception as e:
+        click.echo(click.style(f"Error profiling dataset files: {e}", fg="red"))
+        return
+    click.echo(click.style(f"Profile stored for {profiled} datasets.", fg="green"))
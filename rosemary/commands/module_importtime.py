@@ -0,0 +1,88 @@
+import os
+import re
+import subprocess
+import sys
+
+import click
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(output):
+    """Builds the import tree printed by `python -X importtime` (children come before their parent)."""
+    stack = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = len(indent) // 2
+        children = []
+        while stack and stack[-1]["depth"] > depth:
+            children.insert(0, stack.pop())
+        stack.append(
+            {"name": name, "depth": depth, "self": int(self_us), "cumulative": int(cumulative_us), "children": children}
+        )
+    return stack
+
+
+def walk(nodes):
+    for node in nodes:
+        yield node
+        yield from walk(node["children"])
+
+
+def attribute_to_modules(roots):
+    """
+    Adds up the import time of every package under the app module that first imported it, so a module is charged
+    for the heavy dependencies it drags in.
+    """
+    times = {}
+
+    def visit(node, owner):
+        match = re.match(r"app\.modules\.(\w+)", node["name"])
+        owner = match.group(1) if match else owner
+        if owner:
+            times[owner] = times.get(owner, 0) + node["self"]
+        for child in node["children"]:
+            visit(child, owner)
+
+    for root in roots:
+        visit(root, None)
+    return times
+
+
+@click.command("module:importtime", help="Reports how long the app and each of its modules take to import.")
+@click.option("--top", default=10, show_default=True, help="Number of heaviest third-party packages to list.")
+@click.option("--budget", default=0.0, help="Exit with an error if importing the app takes longer (seconds).")
+def module_importtime(top, budget):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+    )
+    if result.returncode != 0:
+        click.echo(click.style(f"Error importing the app:\n{result.stderr[-2000:]}", fg="red"))
+        raise SystemExit(1)
+
+    roots = parse_importtime(result.stderr)
+    total = sum(root["cumulative"] for root in roots if root["name"] == "app") / 1e6
+    modules = attribute_to_modules(roots)
+    packages = sorted(
+        (node for node in walk(roots) if "." not in node["name"] and node["name"] not in ("app", "core")),
+        key=lambda node: node["cumulative"],
+        reverse=True,
+    )
+
+    click.echo(click.style(f"Importing the app took {total:.3f}s", fg="green"))
+    click.echo("\nModules (including the dependencies they import first):")
+    for name, micros in sorted(modules.items(), key=lambda item: item[1], reverse=True):
+        click.echo(f"  {name:<20} {micros / 1000:>9.1f} ms")
+    click.echo(f"\nHeaviest packages (top {top}):")
+    for package in packages[:top]:
+        click.echo(f"  {package['name']:<20} {package['cumulative'] / 1000:>9.1f} ms")
+
+    if budget and total > budget:
+        click.echo(click.style(f"\nOver the startup budget of {budget:.3f}s", fg="red"))
+        raise SystemExit(1)
@@ -0,0 +1,36 @@
+import time
+
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("stats:rollup", help="Folds new view and download records into the daily dataset statistics.")
+@click.option("--rebuild", is_flag=True, help="Drop the rollups and recompute them from every record.")
+@click.option("--every", default=0, show_default=True, help="Repeat every this many seconds (0 runs once).")
+@with_appcontext
+def stats_rollup(rebuild, every):
+    from app import db
+    from app.modules.dataset.services import DSStatsRollupService
+
+    service = DSStatsRollupService()
+    while True:
+        try:
+            updated = service.rollup(rebuild=rebuild)
+        except KeyboardInterrupt:
+            click.echo(click.style("Statistics rollup stopped.", fg="yellow"))
+            return
+        except Exception as e:
+            db.session.rollback()
+            click.echo(click.style(f"Error rolling up the statistics: {e}", fg="red"))
+            if not every:
+                raise SystemExit(1)
+        else:
+            click.echo(click.style(f"Statistics rollup updated {updated} dataset days.", fg="green"))
+        if not every:
+            return
+        rebuild = False
+        try:
+            time.sleep(every)
+        except KeyboardInterrupt:
+            click.echo(click.style("Statistics rollup stopped.", fg="yellow"))
+            return
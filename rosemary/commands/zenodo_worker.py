@@ -0,0 +1,22 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("zenodo:worker", help="Runs the queued Zenodo depositions of uploaded datasets.")
+@click.option("--once", is_flag=True, help="Process the jobs that are due and exit instead of polling.")
+@click.option("--poll-interval", default=5.0, show_default=True, help="Seconds to wait when the queue is empty.")
+@click.option("--max-jobs", default=0, show_default=True, help="Exit after this many jobs (0 means no limit).")
+@with_appcontext
+def zenodo_worker(once, poll_interval, max_jobs):
+    from app.modules.zenodo.services import ZenodoJobService
+
+    click.echo(click.style("Zenodo worker started, waiting for jobs...", fg="yellow"))
+    try:
+        processed = ZenodoJobService().run_worker(poll_interval=poll_interval, once=once, max_jobs=max_jobs)
+    except KeyboardInterrupt:
+        click.echo(click.style("Zenodo worker stopped.", fg="yellow"))
+        return
+    except Exception as e:
+        click.echo(click.style(f"Error running the Zenodo worker: {e}", fg="red"))
+        raise SystemExit(1)
+    click.echo(click.style(f"Zenodo worker processed {processed} jobs.", fg="green"))